@@ -1,22 +1,1599 @@
 # INTERFACEGEMINIDIFF.py
+import bisect
+import contextlib
+import copy
+import hashlib
+import importlib
+import heapq
+import itertools
 import json
+import math
+import mmap
 import os
+import queue
 import re
 import random
-from Core import Core 
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import ChainMap, OrderedDict, defaultdict, deque
+from collections.abc import Mapping, MutableMapping
+from functools import lru_cache
+
+# Core and the heavier stdlib modules (asyncio, http.client, multiprocessing, argparse,
+# concurrent.futures, and a few used by one code path each) are imported where they are first used, which keeps spawning
+# session workers and one-off CLI runs fast; see --import-report.
+
+
+@lru_cache(maxsize=None)
+def _core():
+    """The Core subsystems module, imported on first use."""
+    package = importlib.import_module("Core")
+    try:
+        return package.Core
+    except AttributeError:
+        return importlib.import_module("Core.Core")
+
+
+KOBOLD_ENDPOINT = os.environ.get("KOBOLD_ENDPOINT", "127.0.0.1:5001")
+CONTENT_DIR = os.environ.get("GAME_CONTENT_DIR", "content_packs")
+GAZETTEER_PATH = os.environ.get("GAME_GAZETTEER_PATH", "gazetteer.csv")
+GEODATA_PATH = os.environ.get("GAME_GEODATA_PATH", "geodata.bin")
+
+# Built-in content pack. Packs in CONTENT_DIR use the same layout and are merged over it.
+# Clues and encounters are plain strings (usable anywhere) or dicts with 'text' and an
+# optional 'genre' and/or 'country' they are limited to.
+DEFAULT_CONTENT = {
+    'genres': {
+        "detective": {"themes": ["noir", "procedural", "private eye", "true crime"]},
+        "scifi": {"themes": ["space opera", "cyberpunk", "time travel", "post-apocalyptic"]},
+        "romance": {"themes": ["rom-com", "drama", "historical", "contemporary"]},
+        "documentary": {"themes": ["nature", "historical", "biographical", "investigative"]},
+        "horror": {"themes": ["psychological", "supernatural", "slasher", "cosmic"]},
+        "comedy": {"themes": ["sitcom", "dark comedy", "satire", "slapstick"]},
+        "drama": {"themes": ["medical", "legal", "family", "political"]},
+        "fantasy": {"themes": ["high fantasy", "urban", "magical realism", "mythological"]},
+        "thriller": {"themes": ["psychological", "action", "conspiracy", "espionage"]},
+        "western": {"themes": ["classical", "modern", "space western", "neo-western"]},
+        "sports": {"themes": ["underdog", "comeback", "team building", "competition"]},
+        "musical": {"themes": ["broadway", "rock opera", "dance", "biographical"]},
+        "adventure": {"themes": ["exploration", "treasure hunt", "survival", "journey"]},
+        "war": {"themes": ["historical", "futuristic", "resistance", "espionage"]},
+        "crime": {"themes": ["heist", "mob", "white collar", "international"]},
+        "supernatural": {"themes": ["paranormal", "mythical", "urban fantasy", "occult"]}
+    },
+    'clues': [
+        "A suspicious person was seen near the library.",
+        "A receipt found at the crime scene leads to a cafe.",
+        "Witnesses mentioned hearing a strange sound last night."
+    ],
+    'encounters': [
+        "You encounter a mysterious stranger in the alley.",
+        "Someone asks you for directions and seems suspicious.",
+        "You overhear a conversation about a recent theft."
+    ],
+    'stories': {
+        "USA": {
+            "genre": "detective",
+            "title": "The Great American Mystery",
+            "plot": "You're a freelance detective gathering clues across the city...",
+            "town": "Anytown USA",
+            "endings": ["success", "failure", "mystery unresolved"]
+        },
+        "England": {
+            "genre": "sci-fi",
+            "title": "The Sci-fi Chronicles",
+            "plot": "You find yourself in a futuristic England with high-tech mysteries...",
+            "town": "London",
+            "endings": ["success", "tragedy", "happy ending"]
+        },
+        "*": {
+            "genre": "adventure",
+            "title": "The Global Quest",
+            "plot": "You embark on a journey around the world...",
+            "town": "Generic Town",
+            "endings": ["success", "failure", "mixed outcome"]
+        }
+    },
+    'adventures': [
+        {"title": "The Lost Treasure", "starting_location": {"country": "Eldoria", "town": "Silverwood", "latitude": 34.5, "longitude": -118.2}},
+        {"title": "The Mystery of the Missing Scientist", "starting_location": {"country": "Atlantis", "town": "Aquatica", "latitude": 25.5, "longitude": -80.2}},
+    ],
+    'locations': { #Simplified locations for demonstration
+        "city1": {'name': "City 1", 'landmarks': ["Landmark 1", "Landmark 2"], 'events': ["Event 1"]},
+        "city2": {'name': "City 2", 'landmarks': ["Landmark 3", "Landmark 4"], 'events': ["Event 2"]},
+    },
+}
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text; no tokenizer dependency
+    return (len(text) + 3) // 4
+
+
+def trim_to_tokens(text: str, budget: int, keep_end=False) -> str:
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    return text[-limit:] if keep_end else text[:limit]
+
+
+class ContextBuilder:
+    """Builds LLM prompts under a hard token budget.
+
+    Recent events are kept verbatim in a rolling window. Events that fall out of the window
+    are condensed to their first sentence and folded into a running summary, which is itself
+    bounded, so building a prompt costs the same on turn 10 and on turn 10,000.
+    """
+
+    def __init__(self, budget=1024, recent_events=12, summary_budget=256, event_budget=96):
+        self.budget = budget
+        self.recent_events = recent_events
+        self.summary_budget = summary_budget
+        self.event_budget = event_budget
+        self.recent = deque()   # (text, tokens), oldest first
+        self.summary = deque()  # condensed older events, oldest first
+        self.summary_tokens = 0
+        self.last_report = {}
+
+    def record(self, text: str):
+        text = " ".join(str(text).split())
+        if not text:
+            return
+        text = trim_to_tokens(text, self.event_budget)
+        self.recent.append((text, estimate_tokens(text)))
+        while len(self.recent) > self.recent_events:
+            self._fold(self.recent.popleft()[0])
+
+    def clear(self):
+        self.recent.clear()
+        self.summary.clear()
+        self.summary_tokens = 0
+
+    def _fold(self, text):
+        sentence = text.split(". ")[0].rstrip(".") + "."
+        sentence = trim_to_tokens(sentence, max(8, self.event_budget // 4))
+        tokens = estimate_tokens(sentence)
+        self.summary.append((sentence, tokens))
+        self.summary_tokens += tokens
+        while self.summary_tokens > self.summary_budget and self.summary:
+            self.summary_tokens -= self.summary.popleft()[1]
+
+    @staticmethod
+    def profile_slice(profile) -> dict:
+        """The few profile fields a prompt needs, instead of the whole profile."""
+        location = profile.get('current_location')
+        if isinstance(location, dict):
+            location = f"{location.get('town')}, {location.get('country')}"
+        mood = profile.get('emotional_state') or {}
+        return {
+            'name': profile.get('name'),
+            'location': location,
+            'money': profile.get('money'),
+            'time': round(profile.get('time', 0), 2),
+            'mood': max(mood, key=mood.get) if mood else None,
+        }
+
+    def history_text(self) -> str:
+        return " ".join([text for text, _ in self.summary] + [text for text, _ in self.recent])
+
+    def build(self, prompt: str, profile=None) -> str:
+        """Prompt with as much history as fits the budget; token counts go to last_report."""
+        prompt = trim_to_tokens(prompt, self.budget // 2, keep_end=True)
+        remaining = self.budget - estimate_tokens(prompt)
+
+        header = ""
+        if profile is not None:
+            header = "[Player] " + ", ".join(f"{key}: {value}" for key, value in self.profile_slice(profile).items())
+            header = trim_to_tokens(header, remaining // 4)
+            remaining -= estimate_tokens(header)
+
+        recent, recent_tokens = [], 0
+        for text, tokens in reversed(self.recent):
+            if tokens > remaining:
+                break
+            recent.append(text)
+            recent_tokens += tokens
+            remaining -= tokens
+        recent.reverse()
+
+        summary, summary_tokens = [], 0
+        for text, tokens in reversed(self.summary):
+            if tokens > remaining:
+                break
+            summary.append(text)
+            summary_tokens += tokens
+            remaining -= tokens
+        summary.reverse()
+
+        parts = [header] if header else []
+        if summary:
+            parts.append("[Story so far] " + " ".join(summary))
+        if recent:
+            parts.append("[Recent] " + " ".join(recent))
+        parts.append(prompt)
+        text = "\n".join(parts)
+
+        self.last_report = {
+            'budget': self.budget,
+            'prompt': estimate_tokens(prompt),
+            'profile': estimate_tokens(header),
+            'summary': summary_tokens,
+            'recent': recent_tokens,
+            'total': estimate_tokens(text),
+        }
+        return text
+
+
+class NarrationCache:
+    """Content-addressed narration cache with LRU and TTL eviction."""
+
+    def __init__(self, max_entries=256, ttl=6 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> (expires_at, narration)
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    @staticmethod
+    def make_key(prompt: str, state=None) -> str:
+        payload = json.dumps([prompt, state], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    @staticmethod
+    def cacheable(narration) -> bool:
+        # Outage fallbacks and empty results would otherwise stick around for the whole TTL
+        return isinstance(narration, str) and bool(narration.strip()) and narration != KoboldClient.FALLBACK_NARRATION
+
+    def put(self, key, narration: str):
+        if not self.cacheable(narration):
+            return
+        self.entries[key] = (time.time() + self.ttl, narration)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _stored(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (IOError, ValueError):
+            return {}
+        now = time.time()
+        return {key: (expires_at, narration) for key, (expires_at, narration) in stored.items()
+                if expires_at > now and self.cacheable(narration)}
+
+    def load(self):
+        self.entries.update(self._stored())
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return False
+        # Other processes write the same file: keep their entries, with ours as the most recent
+        entries = OrderedDict(self._stored())
+        for key, entry in self.entries.items():
+            entries.pop(key, None)
+            entries[key] = entry
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except IOError as e:
+            print(f"Failed to save narration cache: {e}")
+            return False
+
+
+class MapCache:
+    """Memoizes map generation by normalized location (country, town, lat, long).
+
+    Bounded LRU in memory, optionally persisted to disk as JSON; maps that are not plain JSON
+    data are regenerated rather than stored. Invalidation hooks are told when entries are
+    dropped so dependent state (scene descriptions, encounters) can be refreshed.
+    """
+
+    def __init__(self, generate=None, max_entries=128, path=None):
+        self.generate = generate
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hooks = []
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    @staticmethod
+    def normalize(location):
+        if isinstance(location, dict):
+            def coordinate(name):
+                value = location.get(name)
+                return round(float(value), 4) if isinstance(value, (int, float)) else None
+            return (
+                str(location.get('country', "")).strip().lower(),
+                str(location.get('town', "")).strip().lower(),
+                coordinate('latitude'),
+                coordinate('longitude'),
+            )
+        return (str(location).strip().lower(), "", None, None)
+
+    def get(self, location, generate=None):
+        """Cached map for location; a miss calls generate, or the cache's own generator."""
+        key = self.normalize(location)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        result = (generate or self.generate)(location)
+        self.entries[key] = result
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            self._notify(evicted)
+        return result
+
+    def add_invalidation_hook(self, callback):
+        self.hooks.append(callback)
+
+    def _notify(self, key):
+        for callback in self.hooks:
+            callback(key)
+
+    def invalidate(self, location=None):
+        """Drop one location, or everything when location is None."""
+        keys = list(self.entries) if location is None else [self.normalize(location)]
+        for key in keys:
+            if self.entries.pop(key, None) is not None:
+                self._notify(key)
+
+    def _stored(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return OrderedDict((tuple(key), value) for key, value in json.load(f))
+        except (IOError, ValueError, TypeError):
+            return OrderedDict()
+
+    def load(self):
+        self.entries.update(self._stored())
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return False
+        # Other processes write the same file: keep their entries, with ours as the most recent
+        entries = self._stored()
+        for key, value in self.entries.items():
+            try:
+                json.dumps(value)
+            except (TypeError, ValueError):
+                continue
+            entries.pop(key, None)
+            entries[key] = value
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        stored = [[list(key), value] for key, value in entries.items()]
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except IOError as e:
+            print(f"Failed to save map cache: {e}")
+            return False
+
+
+_SHARED_CACHES = {}
+
+
+def get_shared_cache(cache_class, path):
+    """Process-wide cache persisted at path: loaded once and shared by every session in the
+    process, so the file is read and written once per process instead of once per session."""
+    key = (cache_class, path)
+    if key not in _SHARED_CACHES:
+        _SHARED_CACHES[key] = cache_class(path=path)
+    return _SHARED_CACHES[key]
+
+
+def save_shared_caches():
+    for cache in _SHARED_CACHES.values():
+        cache.save()
+
+
+class Place:
+    __slots__ = ('name', 'kind', 'country', 'latitude', 'longitude')
+
+    def __init__(self, name, kind, country, latitude, longitude):
+        self.name = name
+        self.kind = kind  # 'town' or 'landmark'
+        self.country = country
+        self.latitude = latitude
+        self.longitude = longitude
+
+    def as_location(self) -> dict:
+        return {'country': self.country, 'town': self.name, 'latitude': self.latitude, 'longitude': self.longitude}
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """Uniform lat/long grid over the gazetteer for radius and nearest-neighbour queries.
+
+    Queries only visit the cells overlapping the search area, so their cost depends on
+    local density rather than on the size of the world.
+    """
+    KM_PER_DEGREE = 111.32
+
+    def __init__(self, places=(), cell_degrees=0.5):
+        self.cell_degrees = cell_degrees
+        self.places = []
+        self.cells = defaultdict(list)
+        self.by_name = {}
+        for place in places:
+            self.add(place)
+
+    def _cell(self, latitude, longitude):
+        return (int(math.floor(latitude / self.cell_degrees)), int(math.floor(longitude / self.cell_degrees)))
+
+    def add(self, place: Place):
+        self.places.append(place)
+        self.cells[self._cell(place.latitude, place.longitude)].append(place)
+        self.by_name.setdefault(place.name.lower(), place)
+
+    def __len__(self):
+        return len(self.places)
+
+    def find(self, name):
+        return self.by_name.get(str(name).lower())
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Load a gazetteer with name, kind, country, latitude and longitude columns."""
+        import csv
+
+        index = cls(**kwargs)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                index.add(Place(row['name'], row.get('kind') or 'town', row.get('country', ''),
+                                float(row['latitude']), float(row['longitude'])))
+        return index
+
+    def _cells_within(self, latitude, longitude, radius_km):
+        lat_span = radius_km / self.KM_PER_DEGREE
+        lon_span = radius_km / (self.KM_PER_DEGREE * max(0.01, math.cos(math.radians(min(89.0, abs(latitude) + lat_span)))))
+        lat_cells = range(int(math.floor((latitude - lat_span) / self.cell_degrees)),
+                          int(math.floor((latitude + lat_span) / self.cell_degrees)) + 1)
+        if lon_span >= 180:
+            lon_cells = range(int(math.floor(-180 / self.cell_degrees)), int(math.floor(180 / self.cell_degrees)) + 1)
+        else:
+            lon_cells = range(int(math.floor((longitude - lon_span) / self.cell_degrees)),
+                              int(math.floor((longitude + lon_span) / self.cell_degrees)) + 1)
+        wrap = int(round(360 / self.cell_degrees))
+        half = wrap // 2
+        seen = set()
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                # Wrap across the antimeridian
+                lon_cell = (lon_cell + half) % wrap - half
+                if (lat_cell, lon_cell) not in seen:
+                    seen.add((lat_cell, lon_cell))
+                    yield (lat_cell, lon_cell)
+
+    def _places_in(self, cell):
+        return self.cells.get(cell, ())
+
+    def nearby(self, latitude, longitude, radius_km, kind=None):
+        """Places within radius_km as (distance_km, place), nearest first."""
+        found = []
+        for cell in self._cells_within(latitude, longitude, radius_km):
+            for place in self._places_in(cell):
+                if kind and place.kind != kind:
+                    continue
+                distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+                if distance <= radius_km:
+                    found.append((distance, place))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, latitude, longitude, kind=None, max_km=20000.0):
+        radius = self.cell_degrees * self.KM_PER_DEGREE
+        while True:
+            found = self.nearby(latitude, longitude, min(radius, max_km), kind)
+            if found or radius >= max_km:
+                return found[0] if found else None
+            radius *= 2
+
+    def route_candidates(self, latitude, longitude, count=5, min_km=1.0, max_km=1000.0):
+        """Towns worth travelling to from here: the nearest ones beyond min_km."""
+        radius = max(min_km * 2, self.cell_degrees * self.KM_PER_DEGREE)
+        while True:
+            found = [item for item in self.nearby(latitude, longitude, min(radius, max_km), 'town') if item[0] >= min_km]
+            if len(found) >= count or radius >= max_km:
+                return found[:count]
+            radius *= 2
+
+
+class _RecordKeys:
+    """Sequence view of the cell keys of a GeoDataStore, for bisect."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.count
+
+    def __getitem__(self, index):
+        return self.store.RECORD_KEY.unpack_from(self.store.data, self.store.records_offset + index * self.store.RECORD.size)[0]
+
+
+class GeoDataStore(SpatialIndex):
+    """Read-only, memory-mapped gazetteer compiled by GeoDataStore.build.
+
+    Layout: header, fixed-size records sorted by grid cell, a name index of record numbers
+    sorted by lower-cased name, then the string table. Lookups bisect the mapped file
+    directly, so nothing is parsed at startup and worker processes share the page cache.
+    Places added at runtime are kept in memory on top of the file.
+    """
+    MAGIC = b'GEO1'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHfIII')  # magic, version, reserved, cell degrees, count, name index, strings
+    RECORD = struct.Struct('<IffIHIHB')  # cell key, lat, lon, name offset/length, country offset/length, kind
+    RECORD_KEY = struct.Struct('<I')
+    INDEX_ENTRY = struct.Struct('<I')
+    KINDS = ('town', 'landmark', 'poi')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, cell_degrees, count, self.index_offset, self.strings_offset = self.HEADER.unpack_from(self.data, 0)
+        if magic != self.MAGIC or version > self.VERSION:
+            raise ValueError(f"{path} is not a supported geodata file")
+        super().__init__(cell_degrees=cell_degrees)
+        self.path = path
+        self.count = count
+        self.records_offset = self.HEADER.size
+        self.keys = _RecordKeys(self)
+
+    @staticmethod
+    def _cell_key(cell):
+        lat_cell, lon_cell = cell
+        return ((lat_cell + 0x8000) << 16) | (lon_cell + 0x8000)
+
+    def _string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length].decode('utf-8')
+
+    def _record(self, index) -> Place:
+        _, latitude, longitude, name_offset, name_length, country_offset, country_length, kind = \
+            self.RECORD.unpack_from(self.data, self.records_offset + index * self.RECORD.size)
+        return Place(self._string(name_offset, name_length), self.KINDS[kind],
+                     self._string(country_offset, country_length), latitude, longitude)
+
+    def _places_in(self, cell):
+        key = self._cell_key(cell)
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key, lo=start)
+        places = [self._record(index) for index in range(start, end)]
+        return places + self.cells.get(cell, [])
+
+    def __len__(self):
+        return self.count + len(self.places)
+
+    def find(self, name):
+        lowered = str(name).lower()
+        if lowered in self.by_name:
+            return self.by_name[lowered]
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            index = self.INDEX_ENTRY.unpack_from(self.data, self.index_offset + middle * self.INDEX_ENTRY.size)[0]
+            place = self._record(index)
+            if place.name.lower() < lowered:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            index = self.INDEX_ENTRY.unpack_from(self.data, self.index_offset + low * self.INDEX_ENTRY.size)[0]
+            place = self._record(index)
+            if place.name.lower() == lowered:
+                return place
+        return None
+
+    def close(self):
+        self.data.close()
+
+    @classmethod
+    def build(cls, places, path, cell_degrees=0.5):
+        """Compile places into a geodata file; written to a temp file and renamed into place."""
+        grid = SpatialIndex(cell_degrees=cell_degrees)
+        records = sorted(
+            ((cls._cell_key(grid._cell(place.latitude, place.longitude)), place) for place in places),
+            key=lambda item: (item[0], item[1].name.lower()),
+        )
+
+        strings = bytearray()
+        string_offsets = {}
+
+        def intern(text):
+            if text not in string_offsets:
+                encoded = text.encode('utf-8')
+                string_offsets[text] = (len(strings), len(encoded))
+                strings.extend(encoded)
+            return string_offsets[text]
+
+        packed = bytearray()
+        for key, place in records:
+            name_offset, name_length = intern(place.name)
+            country_offset, country_length = intern(place.country or "")
+            kind = cls.KINDS.index(place.kind) if place.kind in cls.KINDS else cls.KINDS.index('poi')
+            packed += cls.RECORD.pack(key, place.latitude, place.longitude,
+                                      name_offset, name_length, country_offset, country_length, kind)
+
+        name_order = sorted(range(len(records)), key=lambda index: records[index][1].name.lower())
+        name_index = b"".join(cls.INDEX_ENTRY.pack(index) for index in name_order)
+        index_offset = cls.HEADER.size + len(packed)
+        strings_offset = index_offset + len(name_index)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, cell_degrees, len(records), index_offset, strings_offset))
+            f.write(packed)
+            f.write(name_index)
+            f.write(strings)
+        os.replace(tmp_path, path)
+        return len(records)
+
+
+def build_geodata(csv_path, output_path, cell_degrees=0.5):
+    """Compile a gazetteer CSV (name, kind, country, latitude, longitude) into a geodata file."""
+    return GeoDataStore.build(SpatialIndex.from_csv(csv_path).places, output_path, cell_degrees)
+
+
+@lru_cache(maxsize=None)
+def get_spatial_index(path=GAZETTEER_PATH, geodata_path=GEODATA_PATH):
+    """Process-wide gazetteer: the compiled geodata file when present, else the CSV.
+    Seeded with the built-in adventure locations."""
+    if os.path.exists(geodata_path):
+        index = GeoDataStore(geodata_path)
+    else:
+        index = SpatialIndex.from_csv(path) if os.path.exists(path) else SpatialIndex()
+    seeds = [adventure['starting_location'] for adventure in get_content_registry().adventures]
+    seeds.append({"country": "South Africa", "town": "Soweto", "latitude": -26.229622, "longitude": 27.873667})
+    for location in seeds:
+        if not index.find(location['town']):
+            index.add(Place(location['town'], 'town', location['country'], location['latitude'], location['longitude']))
+    return index
+
+
+class ContentRegistry:
+    """Game content loaded once and indexed by genre, country and location.
+
+    Packs are the *.json files in a content directory, merged over DEFAULT_CONTENT. The merged
+    content is cached as JSON next to the packs and reused while the packs are unchanged; the
+    cache is plain data, so a content directory never holds anything that gets executed.
+    """
+    CACHE_FILE = ".content_registry.cache"
+    CACHE_VERSION = 2
+    SAMPLE_PER_BUCKET = 3  # entries drawn from each matching bucket, however large the pack
+
+    def __init__(self, content):
+        self.genres = {genre: tuple(data['themes']) for genre, data in content['genres'].items()}
+        self.genre_names = tuple(self.genres)
+
+        self.clues = self._index(content['clues'])
+        self.encounters = self._index(content['encounters'])
+        self.stories = dict(content['stories'])
+        self.adventures = tuple(content['adventures'])
+        self.locations = dict(content['locations'])
+
+    @staticmethod
+    def _index(entries):
+        # (genre, country) -> texts, with None as the wildcard on either side
+        index = defaultdict(list)
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {'text': entry}
+            index[(entry.get('genre'), entry.get('country'))].append(entry['text'])
+        return {key: tuple(texts) for key, texts in index.items()}
+
+    @classmethod
+    def _lookup(cls, index, genre, country):
+        # A few entries from each bucket, most specific first, so the cost doesn't grow with the pack
+        found = []
+        for key in dict.fromkeys(((genre, country), (genre, None), (None, country), (None, None))):
+            texts = index.get(key, ())
+            found.extend(random.sample(texts, cls.SAMPLE_PER_BUCKET) if len(texts) > cls.SAMPLE_PER_BUCKET else texts)
+        return found
+
+    @classmethod
+    def load(cls, directory=CONTENT_DIR):
+        pack_paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")
+        ) if os.path.isdir(directory) else []
+        signature = [cls.CACHE_VERSION] + [[path, os.path.getmtime(path), os.path.getsize(path)] for path in pack_paths]
+        cache_path = os.path.join(directory, cls.CACHE_FILE)
+
+        if pack_paths:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached['signature'] == signature:
+                    return cls(cached['content'])
+            except (IOError, ValueError, TypeError, KeyError):
+                pass
+
+        content = copy.deepcopy(DEFAULT_CONTENT)
+        for path in pack_paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                pack = json.load(f)
+            for section, value in pack.items():
+                if isinstance(value, dict):
+                    content.setdefault(section, {}).update(value)
+                else:
+                    content.setdefault(section, []).extend(value)
+        registry = cls(content)
+
+        if pack_paths:
+            try:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump({'signature': signature, 'content': content}, f)
+            except IOError as e:
+                print(f"Could not write content cache: {e}")
+        return registry
+
+    def themes(self, genre):
+        return self.genres[genre]
+
+    def clues_for(self, genre=None, country=None):
+        return self._lookup(self.clues, genre, country)
+
+    def encounters_for(self, genre=None, country=None):
+        return self._lookup(self.encounters, genre, country)
+
+    def story_for(self, country):
+        return self.stories.get(country) or self.stories["*"]
+
+
+@lru_cache(maxsize=None)
+def get_content_registry(directory=CONTENT_DIR):
+    """Process-wide content registry, loaded on first use."""
+    return ContentRegistry.load(directory)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.started, time.perf_counter() - self.started)
+        return False
+
+
+class _InstrumentedService:
+    """Forwards to a Core object, counting and timing each method call."""
+
+    def __init__(self, profiler, name, target):
+        object.__setattr__(self, '_profiler', profiler)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+        profiler, span_name = self._profiler, f"{self._name}.{attr}"
+
+        def call(*args, **kwargs):
+            profiler.calls[span_name] += 1
+            with profiler.span(span_name):
+                return value(*args, **kwargs)
+        return call
+
+    def __setattr__(self, attr, value):
+        setattr(self._target, attr, value)
+
+    def __bool__(self):
+        return bool(self._target)
+
+
+class Profiler:
+    """Named spans, call counters and latency histograms for game turns.
+
+    Disabled profilers hand out a shared no-op span, so instrumented code costs one method
+    call per stage. Enable with GAME_PROFILE=1; the results are written to GAME_PROFILE_PATH,
+    as a Chrome trace when the path ends in .trace.json.
+    """
+
+    def __init__(self, enabled=False, path=None, max_events=100_000):
+        self.enabled = enabled
+        self.path = path
+        self.origin = time.perf_counter()
+        self.durations = defaultdict(list)  # span name -> durations in seconds
+        self.calls = defaultdict(int)  # "service.method" -> call count
+        self.events = deque(maxlen=max_events)  # (name, start, duration, thread id) for traces
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, started, duration):
+        self.durations[name].append(duration)
+        self.events.append((name, started - self.origin, duration, threading.get_ident()))
+
+    def instrument(self, name, service):
+        if not self.enabled or service is None:
+            return service
+        return _InstrumentedService(self, name, service)
+
+    def summary(self) -> dict:
+        spans = {}
+        for name, durations in self.durations.items():
+            ordered = sorted(durations)
+            spans[name] = {
+                'count': len(ordered),
+                'total_ms': sum(ordered) * 1000,
+                'p50_ms': percentile(ordered, 0.50) * 1000,
+                'p95_ms': percentile(ordered, 0.95) * 1000,
+                'p99_ms': percentile(ordered, 0.99) * 1000,
+                'max_ms': ordered[-1] * 1000,
+            }
+        return {'spans': spans, 'calls': dict(sorted(self.calls.items()))}
+
+    def chrome_trace(self) -> dict:
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': name, 'ph': 'X', 'ts': started * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': tid}
+                for name, started, duration, tid in self.events
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'calls': dict(self.calls)},
+        }
+
+    def export(self, path=None):
+        path = path or self.path
+        if not self.enabled or not path:
+            return None
+        data = self.chrome_trace() if path.endswith('.trace.json') else self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+    def reset(self):
+        self.origin = time.perf_counter()
+        self.durations.clear()
+        self.calls.clear()
+        self.events.clear()
+
+
+PROFILER = Profiler(
+    enabled=os.environ.get("GAME_PROFILE", "0") == "1",
+    path=os.environ.get("GAME_PROFILE_PATH", "game_profile.json"),
+)
+
+
+class ServiceRegistry:
+    """Builds each Core service once, on first access, after its declared dependencies."""
+
+    def __init__(self, wrap=None):
+        self.factories = {}
+        self.dependencies = {}
+        self.services = {}
+        self.wrap = wrap  # Optional (name, service) -> service hook, e.g. Profiler.instrument
+        self.timings = {}  # name -> build time in seconds
+        self._locks = {}
+
+    def register(self, name, factory, depends_on=()):
+        self.factories[name] = factory
+        self.dependencies[name] = tuple(depends_on)
+        self._locks[name] = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.factories
+
+    def get(self, name):
+        if name in self.services:
+            return self.services[name]
+        if name not in self.factories:
+            raise KeyError(f"Unknown service: {name}")
+
+        with self._locks[name]:
+            if name in self.services:
+                return self.services[name]
+            for dependency in self.dependencies[name]:
+                self.get(dependency)
+            started = time.perf_counter()
+            try:
+                service = self.factories[name]()
+            except Exception as e:
+                print(f"Failed to initialize {name}: {e}")
+                service = None
+            self.timings[name] = time.perf_counter() - started
+            if self.wrap is not None:
+                service = self.wrap(name, service)
+            self.services[name] = service
+            return service
+
+    def warm_up(self, names=None, max_workers=4):
+        """Build services concurrently, one wave of mutually independent services at a time."""
+        pending = set(names or self.factories)
+        for name in list(pending):
+            pending.update(self._all_dependencies(name))
+        pending -= set(self.services)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                ready = [name for name in pending
+                         if all(dep in self.services for dep in self.dependencies[name])]
+                if not ready:
+                    raise RuntimeError(f"Circular service dependencies: {sorted(pending)}")
+                list(executor.map(self.get, ready))
+                pending -= set(ready)
+
+    def _all_dependencies(self, name):
+        found = set()
+        stack = list(self.dependencies[name])
+        while stack:
+            dependency = stack.pop()
+            if dependency not in found:
+                found.add(dependency)
+                stack.extend(self.dependencies[dependency])
+        return found
+
+    def report(self) -> str:
+        lines = [f"{name:<24} {seconds * 1000:8.1f} ms"
+                 for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1])]
+        lines.append(f"{'total':<24} {sum(self.timings.values()) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+class LazySections:
+    """Save sections that are decoded from their raw bytes on first access."""
+
+    def __init__(self, raw=None, digests=None):
+        self.raw = raw or {}  # name -> (codec, bytes)
+        self.digests = digests or {}
+        self.decoded = {}
+
+    def __contains__(self, name):
+        return name in self.decoded or name in self.raw
+
+    def __iter__(self):
+        return iter(set(self.raw) | set(self.decoded))
+
+    def __getitem__(self, name):
+        if name not in self.decoded:
+            codec, payload = self.raw.pop(name)
+            if codec == BinarySaveFormat.CODEC_ZLIB:
+                payload = zlib.decompress(payload)
+            self.decoded[name] = json.loads(payload)
+        return self.decoded[name]
+
+    def __setitem__(self, name, value):
+        self.raw.pop(name, None)
+        self.decoded[name] = value
+
+    def is_decoded(self, name):
+        return name in self.decoded
+
+    def encoded(self, name) -> str:
+        """The section's JSON text, without parsing it if it is still undecoded."""
+        if name in self.raw:
+            codec, payload = self.raw[name]
+            if codec == BinarySaveFormat.CODEC_ZLIB:
+                payload = zlib.decompress(payload)
+            return payload.decode('utf-8')
+        return SaveEngine._encode(self.decoded[name])
+
+
+class DeferredSection:
+    """Placeholder for a save section that has not been decoded yet."""
+
+    def __init__(self, sections, name):
+        self.sections = sections
+        self.name = name
+
+    def resolve(self):
+        return self.sections[self.name]
+
+    def digest(self) -> str:
+        if self.sections.is_decoded(self.name):
+            return SaveEngine._digest(self.encoded())
+        return self.sections.digests[self.name]
+
+    def encoded(self) -> str:
+        return self.sections.encoded(self.name)
+
+
+def deferred_section(sections, name):
+    if isinstance(sections, LazySections) and not sections.is_decoded(name):
+        return DeferredSection(sections, name)
+    return sections[name]
+
+
+class LazyAttribute:
+    """Instance attribute that resolves a DeferredSection the first time it is read."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if isinstance(value, DeferredSection):
+            value = obj.__dict__[self.name] = value.resolve()
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+    def peek(self, obj):
+        """The stored value, left as a DeferredSection if it has not been decoded yet."""
+        return obj.__dict__.get(self.name)
+
+
+class BinarySaveFormat:
+    """Versioned binary snapshot: a struct-packed header and section table followed by
+    optionally zlib-compressed JSON sections."""
+    MAGIC = b'TAGS'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHIH')    # magic, version, generation, section count
+    ENTRY = struct.Struct('<HBII16s')   # name length, codec, offset, length, digest
+    CODEC_JSON = 0
+    CODEC_ZLIB = 1
+    COMPRESS_MIN_BYTES = 256
+
+    @classmethod
+    def is_binary(cls, path) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except IOError:
+            return False
+
+    @classmethod
+    def dump(cls, f, generation: int, encoded: dict, digests: dict):
+        names = [name.encode('utf-8') for name in encoded]
+        payloads = []
+        for text in encoded.values():
+            data = text.encode('utf-8')
+            if len(data) >= cls.COMPRESS_MIN_BYTES:
+                payloads.append((cls.CODEC_ZLIB, zlib.compress(data, 6)))
+            else:
+                payloads.append((cls.CODEC_JSON, data))
+
+        offset = cls.HEADER.size + sum(cls.ENTRY.size + len(name) for name in names)
+        table = []
+        for name, key, (codec, payload) in zip(names, encoded, payloads):
+            table.append(cls.ENTRY.pack(len(name), codec, offset, len(payload), bytes.fromhex(digests[key])) + name)
+            offset += len(payload)
+
+        f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, generation, len(names)))
+        f.write(b"".join(table))
+        for _, payload in payloads:
+            f.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        """Read the section table; section bodies stay encoded until accessed."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, generation, count = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC:
+            raise ValueError("Not a binary save file")
+        if version > cls.VERSION:
+            raise ValueError(f"Unsupported save format version {version}")
+
+        raw, digests = {}, {}
+        position = cls.HEADER.size
+        for _ in range(count):
+            name_length, codec, offset, length, digest = cls.ENTRY.unpack_from(data, position)
+            position += cls.ENTRY.size
+            name = data[position:position + name_length].decode('utf-8')
+            position += name_length
+            raw[name] = (codec, data[offset:offset + length])
+            digests[name] = digest.hex()
+        return generation, LazySections(raw, digests)
+
+
+class SaveEngine:
+    """Incremental saves: changed sections go to an append-only journal that is
+    periodically compacted into an atomically replaced snapshot."""
+    GENERATION_KEY = '_generation'
+
+    def __init__(self, path='save_game.json', compact_every=64, binary=False):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_every = compact_every
+        self.binary = binary
+        self.generation = 0
+        self.section_digests = {}
+        self.journal_records = 0
+
+    @staticmethod
+    def _encode(data) -> str:
+        return json.dumps(data, sort_keys=True, separators=(',', ':'))
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def save(self, sections: dict) -> int:
+        """Persist the sections that changed since the last save; returns how many were written.
+
+        DeferredSection values are carried through undecoded, using their stored digest.
+        """
+        encoded, digests = {}, {}
+        for name, data in sections.items():
+            if isinstance(data, DeferredSection):
+                digests[name] = data.digest()
+            else:
+                encoded[name] = self._encode(data)
+                digests[name] = self._digest(encoded[name])
+        changed = [name for name in sections if digests[name] != self.section_digests.get(name)]
+        if not changed:
+            return 0
+
+        # Before this engine has loaded or saved, journal records could carry a generation the
+        # snapshot on disk doesn't have; start from a fresh snapshot after the stored one instead
+        first_save = not self.section_digests
+        if first_save:
+            self.generation = max(self.generation, self._stored_generation())
+        if first_save or not os.path.exists(self.path) or self.journal_records + len(changed) > self.compact_every:
+            self.compact({name: encoded[name] if name in encoded else sections[name].encoded() for name in sections})
+        else:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write("".join(
+                    f'{{"generation":{self.generation},"section":{json.dumps(name)},'
+                    f'"data":{encoded[name] if name in encoded else sections[name].encoded()}}}\n'
+                    for name in changed
+                ))
+                f.flush()
+            self.journal_records += len(changed)
+
+        self.section_digests.update(digests)
+        return len(changed)
+
+    def _stored_generation(self) -> int:
+        """Generation of the snapshot on disk; 0 when there is none or it can't be read."""
+        try:
+            if BinarySaveFormat.is_binary(self.path):
+                with open(self.path, 'rb') as f:
+                    return BinarySaveFormat.HEADER.unpack(f.read(BinarySaveFormat.HEADER.size))[2]
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return int(json.load(f).get(self.GENERATION_KEY, 0))
+        except (IOError, ValueError, TypeError, AttributeError, struct.error):
+            return 0
+
+    def compact(self, encoded: dict):
+        """Write every section to a fresh snapshot via temp file and rename, then drop the journal."""
+        self.generation += 1
+        tmp_path = f"{self.path}.tmp"
+        if self.binary:
+            digests = {name: self._digest(text) for name, text in encoded.items()}
+            with open(tmp_path, 'wb') as f:
+                BinarySaveFormat.dump(f, self.generation, encoded, digests)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            body = ",".join(f"{json.dumps(name)}:{text}" for name, text in encoded.items())
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(f'{{"{self.GENERATION_KEY}":{self.generation},{body}}}' if body
+                        else f'{{"{self.GENERATION_KEY}":{self.generation}}}')
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Journal records from older generations are ignored on load, so a crash here is harmless
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_records = 0
+
+    def load(self):
+        """Return the saved sections; binary snapshots are decoded lazily, section by section."""
+        if BinarySaveFormat.is_binary(self.path):
+            self.generation, sections = BinarySaveFormat.load(self.path)
+            digests = dict(sections.digests)
+        else:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                sections = json.load(f)
+            self.generation = sections.pop(self.GENERATION_KEY, 0)
+            digests = {name: self._digest(self._encode(data)) for name, data in sections.items()}
+
+        self.journal_records = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb+') as f:
+                intact = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated journal record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final write; everything before it is intact. Cut it off so the
+                        # next save appends on a fresh line instead of onto the broken one.
+                        f.truncate(intact)
+                        break
+                    intact += len(line)
+                    if record.get('generation') == self.generation:
+                        sections[record['section']] = record['data']
+                        digests[record['section']] = self._digest(self._encode(record['data']))
+                        self.journal_records += 1
+
+        self.section_digests = digests
+        return sections
+
+
+class JournalStore:
+    """Append-only log of entries kept in fixed-size chunks.
+
+    Appends are O(1). Once a chunk is full it is sealed and never changes. On save it is
+    written once, to a file named by its content hash, and cold sealed chunks are then
+    dropped from memory. Saves only need the small state() record listing those hashes,
+    and games sharing a save directory can never overwrite each other's chunks.
+    """
+
+    def __init__(self, name, chunk_size=256, hot_chunks=4, directory=None):
+        self.name = name
+        self.chunk_size = chunk_size
+        self.hot_chunks = hot_chunks
+        self.directory = directory
+        self.chunks = [[]]  # sealed chunks (None once only on disk), then the open tail chunk
+        self.keys = []  # content hash of each sealed chunk written to disk, in order
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(len(self.chunks)):
+            yield from self._chunk(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("journal index out of range")
+        return self._chunk(index // self.chunk_size)[index % self.chunk_size]
+
+    def append(self, entry):
+        tail = self.chunks[-1]
+        tail.append(entry)
+        self.count += 1
+        if len(tail) >= self.chunk_size:
+            self.chunks.append([])
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def clear(self):
+        self.chunks = [[]]
+        self.keys = []
+        self.count = 0
+
+    def _chunk_path(self, key):
+        return os.path.join(self.directory, f"{self.name}.{key}.json")
+
+    def _chunk(self, index):
+        chunk = self.chunks[index]
+        if chunk is None:
+            with open(self._chunk_path(self.keys[index]), 'r', encoding='utf-8') as f:
+                chunk = json.load(f)
+        return chunk
+
+    def flush(self) -> int:
+        """Write sealed chunks that are not on disk yet; returns how many were written."""
+        if not self.directory:
+            return 0
+        sealed = len(self.chunks) - 1
+        written = 0
+        for index in range(len(self.keys), sealed):
+            text = json.dumps(self.chunks[index], separators=(',', ':'))
+            key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+            path = self._chunk_path(key)
+            if not os.path.exists(path):
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+                written += 1
+            self.keys.append(key)
+        # Keep the newest hot_chunks sealed chunks in memory; older ones are read back on demand
+        for index in range(max(0, len(self.keys) - self.hot_chunks)):
+            self.chunks[index] = None
+        return written
+
+    def read(self, start, count):
+        start = max(0, start)
+        end = min(self.count, start + count)
+        entries = []
+        while start < end:
+            chunk_index, offset = divmod(start, self.chunk_size)
+            taken = self._chunk(chunk_index)[offset:offset + end - start]
+            entries.extend(taken)
+            start += len(taken)
+        return entries
+
+    def page(self, number, size=20):
+        return self.read((number - 1) * size, size)
+
+    def tail(self, count):
+        return self.read(self.count - count, count)
+
+    def state(self) -> dict:
+        """Small save record: chunks on disk are referenced by hash, the rest are inlined.
+
+        Writes any newly sealed chunks, so call it only when saving.
+        """
+        self.flush()
+        return {
+            'count': self.count,
+            'chunk_size': self.chunk_size,
+            'keys': list(self.keys),
+            'inline': self.chunks[len(self.keys):],
+        }
+
+    def restore(self, state: dict):
+        self.chunk_size = state['chunk_size']
+        self.count = state['count']
+        # Records from before content-hashed chunk files name chunks by index
+        self.keys = state['keys'] if 'keys' in state else [f"{i:06d}" for i in range(state['persisted'])]
+        self.chunks = [None] * len(self.keys) + [list(chunk) for chunk in state['inline']]
+        if len(self.chunks) == len(self.keys) or len(self.chunks[-1]) >= self.chunk_size:
+            self.chunks.append([])
+
+
+class StatBlock(MutableMapping):
+    """Named numeric stats, e.g. skills or emotional_state, stored in one array of doubles.
+
+    Blocks with the same stat names share one names tuple. Whole-number values read back
+    as ints, so the dict view and saves look the same as before. Non-numeric values are
+    still accepted and kept in a small side dict, as a plain dict would.
+    """
+    __slots__ = ('names', 'stats', 'other')
+    _shared_names = {}
+
+    def __init__(self, names=(), values=()):
+        self.names = ()
+        self.stats = array('d')
+        self.other = None  # name -> non-numeric value, created on first use
+        for name, value in zip(names, values):
+            self[name] = value
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        return cls(mapping.keys(), mapping.values())
+
+    @staticmethod
+    def _numeric(value) -> bool:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _set_names(self, names):
+        self.names = self._shared_names.setdefault(names, names)
+
+    def __getitem__(self, name):
+        try:
+            value = self.stats[self.names.index(name)]
+        except ValueError:
+            if self.other and name in self.other:
+                return self.other[name]
+            raise KeyError(name) from None
+        return int(value) if value.is_integer() else value
+
+    def __setitem__(self, name, value):
+        if not self._numeric(value):
+            if name in self.names:
+                self._remove(name)
+            if self.other is None:
+                self.other = {}
+            self.other[name] = value
+        elif name in self.names:
+            self.stats[self.names.index(name)] = value
+        else:
+            if self.other and name in self.other:
+                del self.other[name]
+            self.stats.append(value)
+            self._set_names(self.names + (name,))
+
+    def _remove(self, name):
+        index = self.names.index(name)
+        del self.stats[index]
+        self._set_names(self.names[:index] + self.names[index + 1:])
+
+    def __delitem__(self, name):
+        if name in self.names:
+            self._remove(name)
+        elif self.other and name in self.other:
+            del self.other[name]
+        else:
+            raise KeyError(name)
+
+    def __iter__(self):
+        yield from self.names
+        if self.other:
+            yield from list(self.other)
+
+    def __len__(self):
+        return len(self.names) + (len(self.other) if self.other else 0)
+
+    def __copy__(self):
+        return StatBlock(self.keys(), self.values())
+
+    def __deepcopy__(self, memo):
+        return StatBlock(self.keys(), [copy.deepcopy(value, memo) for value in self.values()])
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+
+class UserProfile(MutableMapping):
+    """The player profile as slotted fields, with the dict-style view existing callers use.
+
+    Known fields are slots (read them as attributes on hot paths, e.g. profile.time); other
+    keys go to `extras`. Stat groups assigned through the mapping view become StatBlocks.
+    """
+    FIELDS = (
+        'name', 'money', 'crew', 'gear', 'activity', 'thoughts', 'known_contacts', 'budget',
+        'visited_countries', 'current_location', 'adventure_summary', 'relationship_status',
+        'clues', 'mysteryProgress', 'skills', 'time', 'language_proficiency', 'emotional_state',
+        'current_narration',
+    )
+    FIELD_SET = frozenset(FIELDS)
+    STAT_FIELDS = frozenset({'skills', 'emotional_state'})
+    __slots__ = FIELDS + ('extras',)
+
+    def __init__(self, values=()):
+        self.extras = {}
+        self.update(values)
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self.extras[key]
+
+    def __setitem__(self, key, value):
+        if key in self.STAT_FIELDS and not isinstance(value, StatBlock):
+            value = StatBlock.from_mapping(value)
+        if key in self.FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.extras[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            del self.extras[key]
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        yield from self.extras
+
+    def __len__(self):
+        return sum(1 for field in self.FIELDS if hasattr(self, field)) + len(self.extras)
+
+    def __deepcopy__(self, memo):
+        return UserProfile({key: copy.deepcopy(value, memo) for key, value in self.items()})
+
+    def __repr__(self):
+        return f"UserProfile({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        """Plain dicts and lists, ready for JSON."""
+        return {key: value.to_dict() if isinstance(value, StatBlock) else value for key, value in self.items()}
+
 
 # GameState (Final, Copy-Pasteable Version)
 class GameState:
-    def __init__(self):
+    # Restored from binary saves on first access
+    story_progress = LazyAttribute()
+    lore_database = LazyAttribute()
+    npcs = LazyAttribute()
+    active_quests = LazyAttribute()
+
+    def __init__(self, service_overrides=None):
         # Single source of truth for user profile
         self._init_user_profile()
         self._init_game_state()
+        self.narration_cache = self._cache(NarrationCache, os.environ.get("NARRATION_CACHE_PATH"))
+        self.context_builder = ContextBuilder(budget=int(os.environ.get("NARRATION_CONTEXT_TOKENS", "1024")))
+        # adventure_summary: story events only, kept apart from the narration history
+        self.story_summary = ContextBuilder(recent_events=8, summary_budget=128)
+        # Full histories; the profile only keeps their recent, bounded part
+        self.journals = {
+            'clues': self.user_profile['clues'],
+            'thoughts': JournalStore('thoughts'),
+            'story': JournalStore('story'),
+        }
+        self.map_cache = self._cache(MapCache, os.environ.get("MAP_CACHE_PATH"))
         # Core objects initialized exactly once
         self.core_objects = {}
-        self.initialize_core_objects()
+        self.initialize_core_objects(service_overrides)
+
+    @staticmethod
+    def _cache(cache_class, path):
+        # Persisted caches are shared by every game state in the process; the rest are private
+        return get_shared_cache(cache_class, path) if path else cache_class()
 
     def _init_user_profile(self):
-        self.user_profile = {
+        self.user_profile = UserProfile({
             'name': "Traveler",
             'money': 100,
             'crew': [],
@@ -35,14 +1612,14 @@ class GameState:
             },
             'adventure_summary': 'You started your journey seeking adventure.',
             'relationship_status': "Single",
-            'clues': [],
+            'clues': JournalStore('clues'),
             'mysteryProgress': 0,
             'skills': {'negotiation': 1, 'combat': 1, 'cooking': 1},
             'time': 0,
             'language_proficiency': 3,
             'emotional_state': {'happiness': 5, 'sadness': 0, 'anger': 0, 'fear': 0, 'love': 0},
             'current_narration': ""
-        }
+        })
 
     def _init_game_state(self):
         self.neighborhood = []
@@ -55,59 +1632,308 @@ class GameState:
         self.npcs = {}
         self.active_quests = {}
 
-    def initialize_core_objects(self):
+    def initialize_core_objects(self, service_overrides=None):
+        # name -> (initializer, dependencies); objects are built lazily on first access
         core_initializers = {
-            'kobold_ai': lambda: Core.KoboldAIIntegration(self, endpoint="127.0.0.1:5001"),
-            'map_generator': lambda: Core.MapGenerator(self),
-            'narrator': lambda: Core.Narrator(self),
-            'encounter_manager': lambda: Core.EncounterManager(self),
-            'game_manager': lambda: Core.GameManager(self),
-            'game_handler': lambda: Core.GameHandler(self),
-            'emotional_state_tracker': lambda: Core.EmotionalStateTracker(self),
-            'communication_system': lambda: Core.CommunicationSystem(self),
-            'game_world': lambda: Core.GameWorld(self),
-            'player': lambda: Core.Player(self.user_profile['name'])
+            'kobold_ai': (lambda: _core().KoboldAIIntegration(self, endpoint=KOBOLD_ENDPOINT), ()),
+            'map_generator': (lambda: _core().MapGenerator(self), ()),
+            'narrator': (lambda: _core().Narrator(self), ('kobold_ai',)),
+            'encounter_manager': (lambda: _core().EncounterManager(self), ('map_generator', 'narrator')),
+            'game_manager': (lambda: _core().GameManager(self), ('map_generator', 'narrator')),
+            'game_handler': (lambda: _core().GameHandler(self), ('game_manager',)),
+            'emotional_state_tracker': (lambda: _core().EmotionalStateTracker(self), ()),
+            'communication_system': (lambda: _core().CommunicationSystem(self), ('narrator',)),
+            'game_world': (lambda: _core().GameWorld(self), ('map_generator',)),
+            'skillset': (lambda: _core().Skillset(self), ()),
+            'player': (lambda: _core().Player(self.user_profile['name']), ()),
             # Add other core objects here
         }
+        # Overrides are factories taking the game state, e.g. {'kobold_ai': StubKoboldAI}
+        for name, factory in (service_overrides or {}).items():
+            depends_on = core_initializers.get(name, (None, ()))[1]
+            core_initializers[name] = (lambda factory=factory: factory(self), depends_on)
+
+        self.services = ServiceRegistry(wrap=PROFILER.instrument if PROFILER.enabled else None)
+        for name, (initializer, depends_on) in core_initializers.items():
+            self.services.register(name, initializer, depends_on)
+        self.core_objects = self.services.services
+
+    def __getattr__(self, name):
+        # Only called for missing attributes: resolve Core objects through the registry
+        services = self.__dict__.get('services')
+        if services is not None and name in services:
+            return services.get(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def initialize_map(self, location):
+        # Revisiting a location is a cache lookup instead of a full map build
+        return self.map_cache.get(location, self.map_generator.initialize_map)
+
+    def save_caches(self):
+        # Both are no-ops unless NARRATION_CACHE_PATH / MAP_CACHE_PATH are set
+        self.narration_cache.save()
+        self.map_cache.save()
+
+    def attach_journals(self, directory):
+        for journal in self.journals.values():
+            journal.directory = directory
+
+    def update_location(self, location):
+        self.user_profile['current_location'] = SafeDataStructures.validate_location(location)
+        self.current_location = self.user_profile['current_location']
 
-        for name, initializer in core_initializers.items():
-            try:
-                self.core_objects[name] = initializer()
-            except Exception as e:
-                print(f"Failed to initialize {name}: {e}")
-                self.core_objects[name] = None
-
-        # Set up initial narration
-        if self.core_objects['kobold_ai']:
-            try:
-                self.user_profile['current_narration'] = self.core_objects['kobold_ai'].generate_narration(
-                    self, "The adventure begins..."
-                )
-            except Exception:
-                self.user_profile['current_narration'] = "The adventure begins..."
+    def narration_state(self):
+        # The slice of state a narration depends on; anything else shares cache entries
+        location = self.user_profile.get('current_location')
+        if isinstance(location, dict):
+            location = (location.get('country'), location.get('town'))
+        return {'location': location, 'genre': self.story_progress.get('current_genre')}
+
+    def cached_narration(self, kobold_ai, prompt, kind='generate_narration'):
+        key = NarrationCache.make_key(f"{kind}:{prompt}", self.narration_state())
+        narration = self.narration_cache.get(key)
+        if narration is None:
+            narration = getattr(kobold_ai, kind)(self, prompt)
+            self.narration_cache.put(key, narration)
+        return narration
 
 class StateManager:
-    def __init__(self, game_state):
+    """Undo/redo log that records, per update, only the profile keys it changed."""
+    _MISSING = object()
+
+    def __init__(self, game_state, max_history=1000):
         self.game_state = game_state
-        self.state_history = []
-        self.max_history = 10
+        self.max_history = max_history
+        self.state_history = deque(maxlen=max_history)  # undo entries: {key: previous value}
+        self.redo_history = []
+
+    def _snapshot(self, keys) -> dict:
+        # Deep copies of just these keys, so later in-place edits can't leak into history
+        profile = self.game_state.user_profile
+        return {key: copy.deepcopy(profile.get(key, self._MISSING)) for key in keys}
+
+    def _restore(self, entry: dict):
+        profile = self.game_state.user_profile
+        for key, value in entry.items():
+            if value is self._MISSING:
+                profile.pop(key, None)
+            else:
+                profile[key] = value
 
     def update_state(self, updates: dict) -> bool:
-        validated_updates = SafeDataStructures.validate_user_profile(updates)
-        current_state = self.game_state.user_profile.copy()
-        self.state_history.append(current_state)
-        if len(self.state_history) > self.max_history:
-            self.state_history.pop(0)
-        
+        validated_updates = PROFILE_SCHEMA.validate(updates, self.game_state.user_profile)
+        return self._apply(validated_updates)
+
+    def apply_batch(self, batch) -> bool:
+        """Apply many updates in one pass, as a single undo step."""
+        validated_updates = PROFILE_SCHEMA.validate_batch(batch, self.game_state.user_profile)
+        return self._apply(validated_updates)
+
+    def _apply(self, validated_updates: dict) -> bool:
+        if not validated_updates:
+            return False
+        self.state_history.append(self._snapshot(validated_updates))
+        self.redo_history.clear()
+
         self.game_state.user_profile.update(validated_updates)
         return True
 
     def revert_state(self) -> bool:
         if self.state_history:
-            self.game_state.user_profile = self.state_history.pop()
+            entry = self.state_history.pop()
+            self.redo_history.append(self._snapshot(entry))
+            self._restore(entry)
+            return True
+        return False
+
+    def redo_state(self) -> bool:
+        if self.redo_history:
+            entry = self.redo_history.pop()
+            self.state_history.append(self._snapshot(entry))
+            self._restore(entry)
             return True
         return False
 
+    @property
+    def history_depth(self) -> int:
+        return len(self.state_history)
+
+
+class EventScheduler:
+    """Event queue with priorities, in-game-time scheduling and a handler registry.
+
+    Plain events go to a FIFO deque. Events with a due time wait in a heap ordered by due
+    time; once due they move, like immediate events with a priority, to a ready heap
+    ordered by priority. Among due events, priority always wins over arrival time.
+    The queue keeps list-style append() for old callers.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock  # returns the current in-game time
+        self.ready = deque()
+        self.urgent = []  # due events with a priority: (-priority, sequence, event)
+        self.scheduled = []  # not yet due: (due_time, sequence, priority, event)
+        self.handlers = {}
+        self._sequence = itertools.count()
+
+    def register(self, event_type: str, handler):
+        self.handlers[event_type] = handler
+
+    def push(self, event: dict, priority=None, at=None, delay=None):
+        priority = event.get('priority', 0) if priority is None else priority
+        at = event.get('at') if at is None else at
+        delay = event.get('delay') if delay is None else delay
+
+        if at is None and not delay:
+            if priority == 0:
+                self.ready.append(event)
+            else:
+                heapq.heappush(self.urgent, (-priority, next(self._sequence), event))
+            return
+        due = at if at is not None else self.clock() + delay
+        heapq.heappush(self.scheduled, (due, next(self._sequence), priority, event))
+
+    append = push
+
+    def __len__(self):
+        return len(self.ready) + len(self.urgent) + len(self.scheduled)
+
+    def __bool__(self):
+        return bool(self.ready or self.urgent or self.scheduled)
+
+    def pop_due(self):
+        """Next event to handle now: higher-priority due events, then the FIFO, then
+        lower-priority due events."""
+        now = self.clock()
+        while self.scheduled and self.scheduled[0][0] <= now:
+            _, _, priority, event = heapq.heappop(self.scheduled)
+            heapq.heappush(self.urgent, (-priority, next(self._sequence), event))
+        if self.urgent and (self.urgent[0][0] < 0 or not self.ready):
+            return heapq.heappop(self.urgent)[2]
+        if self.ready:
+            return self.ready.popleft()
+        return None
+
+    def process(self, max_events=None) -> int:
+        processed = 0
+        while max_events is None or processed < max_events:
+            event = self.pop_due()
+            if event is None:
+                break
+            handler = self.handlers.get(event.get('type'))
+            if handler:
+                handler(event)
+            processed += 1
+        return processed
+
+
+class ProfileSchema:
+    """User profile fields, compiled once into one validator per field.
+
+    Only the keys being updated are checked. A value of the wrong type is dropped, so the
+    profile keeps its current value; keys outside the schema pass through unchanged. Nested
+    fields are dicts of sub-fields and are merged into the current value.
+    """
+    INVALID = object()
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self.validators = {name: self._compile(spec) for name, spec in fields.items()}
+
+    @classmethod
+    def _compile(cls, spec):
+        if isinstance(spec, dict):
+            return cls._compile_nested({name: cls._compile(sub_spec) for name, sub_spec in spec.items()})
+        return cls._compile_type(spec if isinstance(spec, tuple) else (spec,))
+
+    @classmethod
+    def _compile_type(cls, types):
+        invalid = cls.INVALID
+        accepts_bool = bool in types
+        widens_int = float in types and int not in types
+
+        def validate(value, current):
+            if isinstance(value, bool) and not accepts_bool:
+                return invalid
+            if isinstance(value, types):
+                return value
+            if widens_int and isinstance(value, int):
+                return float(value)
+            return invalid
+        return validate
+
+    @classmethod
+    def _compile_nested(cls, validators):
+        invalid = cls.INVALID
+
+        def validate(value, current):
+            if not isinstance(value, Mapping):
+                return invalid
+            merged = dict(current) if isinstance(current, Mapping) else {}
+            for key, item in value.items():
+                validator = validators.get(key)
+                checked = item if validator is None else validator(item, merged.get(key))
+                if checked is not invalid:
+                    merged[key] = checked
+            return merged
+        return validate
+
+    def validate(self, updates: dict, current=None) -> dict:
+        current = {} if current is None else current
+        validated = {}
+        for key, value in updates.items():
+            validator = self.validators.get(key)
+            if validator is None:
+                validated[key] = value
+                continue
+            checked = validator(value, current.get(key))
+            if checked is not self.INVALID:
+                validated[key] = checked
+        return validated
+
+    def validate_batch(self, batch, current=None) -> dict:
+        """Validate a sequence of updates in order; later updates see the earlier ones."""
+        merged = {}
+        view = ChainMap(merged, {} if current is None else current)
+        for updates in batch:
+            merged.update(self.validate(updates, view))
+        return merged
+
+
+NUMBER = (int, float)
+PROFILE_SCHEMA = ProfileSchema({
+    'name': str,
+    'money': NUMBER,
+    'budget': NUMBER,
+    'crew': list,
+    'gear': list,
+    'known_contacts': list,
+    'visited_countries': list,
+    'activity': str,
+    'thoughts': str,
+    'adventure_summary': str,
+    'relationship_status': str,
+    'current_narration': str,
+    'mysteryProgress': NUMBER,
+    'time': NUMBER,
+    'language_proficiency': NUMBER,
+    'skills': Mapping,
+    'current_location': {
+        'country': str,
+        'town': str,
+        'latitude': float,
+        'longitude': float,
+        'neighborhood': (str, type(None)),
+    },
+    'emotional_state': {
+        'happiness': NUMBER,
+        'sadness': NUMBER,
+        'anger': NUMBER,
+        'fear': NUMBER,
+        'love': NUMBER,
+    },
+})
+
 
 class SafeDataStructures:
     @staticmethod
@@ -123,27 +1949,148 @@ class SafeDataStructures:
         }.items()}
 
     @staticmethod
-    def validate_user_profile(profile):
-        default_profile = {
-            'name': str,
-            'money': (int, float),
-            'crew': list,
-            'gear': list,
-            'skills': dict,
-            'emotional_state': dict
-        }
-        
-        return {k: (profile.get(k) if isinstance(profile.get(k), v) else v()) 
-                for k, v in default_profile.items()}
+    def validate_user_profile(profile, current=None):
+        return PROFILE_SCHEMA.validate(profile, current)
+
+class Command:
+    """A routable command: the Interface method it calls and the arguments it accepts."""
+    __slots__ = ('name', 'method', 'params', 'optional', 'fixed_args', 'pass_input', 'rest', 'help')
+
+    def __init__(self, name, method, params=(), optional=(), fixed_args=(), pass_input=False, rest=False, help=""):
+        self.name = name
+        self.method = method          # Interface method name
+        self.params = params          # required (name, type) pairs
+        self.optional = optional      # optional (name, type) pairs
+        self.fixed_args = fixed_args  # leading arguments always passed to the method
+        self.pass_input = pass_input  # pass the raw input line instead of parsed arguments
+        self.rest = rest              # the last argument takes all remaining words ("cape town")
+        self.help = help
+
+    def usage(self) -> str:
+        parts = [self.name] + [f"<{name}>" for name, _ in self.params] + [f"[{name}]" for name, _ in self.optional]
+        return " ".join(parts)
+
+    def parse_args(self, words):
+        specs = self.params + self.optional
+        if self.rest and len(words) > len(specs):
+            words = words[:len(specs) - 1] + [" ".join(words[len(specs) - 1:])]
+        if not len(self.params) <= len(words) <= len(specs):
+            raise ValueError(f"Usage: {self.usage()}")
+        try:
+            return [convert(word) for (_, convert), word in zip(specs, words)]
+        except ValueError:
+            raise ValueError(f"Usage: {self.usage()}") from None
+
+
+class Route:
+    __slots__ = ('command', 'args', 'error')
+
+    def __init__(self, command, args=(), error=None):
+        self.command = command
+        self.args = args
+        self.error = error
+
+    def invoke(self, interface, raw_input=""):
+        if self.error:
+            return self.error
+        command = self.command
+        args = (raw_input,) if command.pass_input else self.args
+        return getattr(interface, command.method)(*command.fixed_args, *args)
+
+
+class CommandRouter:
+    """Command table built once at startup. Multi-word commands and aliases are resolved
+    through a word-level prefix trie; the longest matching phrase wins and the remaining
+    words are parsed as its arguments."""
+    _COMMAND = ""  # trie key holding the command of a node; never a word
+
+    def __init__(self):
+        self.root = {}
+        self.commands = {}
+
+    def register(self, phrase, method, aliases=(), **options):
+        command = Command(phrase, method, **options)
+        self.commands[phrase] = command
+        for name in (phrase, *aliases):
+            node = self.root
+            for word in name.split():
+                node = node.setdefault(word, {})
+            node[self._COMMAND] = command
+        return command
+
+    def _match(self, words):
+        node, match, consumed = self.root, None, 0
+        for index, word in enumerate(words):
+            node = node.get(word)
+            if node is None:
+                break
+            if self._COMMAND in node:
+                match, consumed = node[self._COMMAND], index + 1
+        return match, consumed
+
+    def is_known(self, text: str) -> bool:
+        return self._match(text.lower().split())[0] is not None
+
+    def resolve(self, text: str):
+        # Commands match case-insensitively; arguments keep their case ("interact Bob")
+        words = text.split()
+        command, consumed = self._match([word.lower() for word in words])
+        if command is None:
+            return None
+        if command.pass_input:
+            return Route(command)
+        try:
+            return Route(command, command.parse_args(words[consumed:]))
+        except ValueError as e:
+            return Route(command, error=str(e))
+
+    def help_text(self) -> str:
+        return "\n".join(f"{command.usage():<28} {command.help}".rstrip() for command in self.commands.values())
+
+
+def build_command_router() -> CommandRouter:
+    router = CommandRouter()
+    router.register("show profile", 'show_profile', aliases=("profile",), help="Show your character")
+    router.register("inventory", 'show_inventory', help="List your gear and crew")
+    router.register("explore", 'explore_command', optional=(('location', str),), rest=True, help="Explore a location")
+    router.register("travel", 'travel_method', params=(('method', int),), optional=(('destination', str),),
+                    rest=True, help="Travel by 1. Train, 2. Plane, 3. Boat")
+    router.register("interact", 'interact_with_npc', params=(('npc', str),), aliases=("interact with",),
+                    rest=True, help="Talk to an NPC")
+    router.register("save game", 'save_game', aliases=("save",), help="Save your progress")
+    router.register("load game", 'load_game', aliases=("load",), help="Load the last save")
+    router.register("start game", 'start_interface', help="Choose an adventure")
+    router.register("start story", 'start_story', help="Begin a story at your location")
+    router.register("start adventure", 'start_adventure', fixed_args=({},), help="Begin an adventure here")
+    router.register("next episode", '_generate_episodic_content', pass_input=True, help="Play the next episode")
+    router.register("generate daily scenario", 'generate_daily_scenario', help="Spend a day exploring")
+    router.register("story summary", 'show_progress', optional=(('page', int),), help="Review the clues you found")
+    router.register("story log", 'show_story_log', optional=(('page', int),), help="Read the story so far")
+    router.register("do nothing", 'do_nothing', help="Let time pass")
+    router.register("help", 'show_help', help="Show this list")
+    router.register("exit", 'exit_story', help="Leave the adventure")
+    return router
+
+
+COMMAND_ROUTER = build_command_router()
+
+# Fallback for unrecognized input: "wait 2 hours", "rest for 1 day", ...
+TIME_UNITS = {
+    'year': 365,
+    'month': 30,
+    'week': 7,
+    'day': 1,
+    'hour': 1 / 24,
+    'minute': 1 / 1440,
+    'second': 1 / 86400,
+}
+TIME_PASSAGE_PATTERN = re.compile(r'(\d+)\s*(year|month|week|day|hour|minute|second)s?')
+
 
 class InputValidator:
     @staticmethod
     def validate_command(command: str) -> bool:
-        valid_commands = {
-            'profile', 'explore', 'travel', 'save', 'load', 'exit',
-            'interact', 'inventory', 'quest', 'help'
-        }
-        return command.lower().split()[0] in valid_commands
+        return COMMAND_ROUTER.is_known(command)
 
     @staticmethod
     def sanitize_input(user_input: str) -> str:
@@ -170,82 +2117,561 @@ class ErrorHandler:
         return f"{error_messages.get(error_type, 'An error occurred')}: {details}"
 
 
-class Interface:
-    GAME_TITLE = "Text Adventure Game"
-    EXIT_CMD = "exit"
-    MAX_NARRATION_WORDS = 300
-    SAVE_TOKEN_LIMIT = 500
+class CircuitBreaker:
+    """Opens after repeated failures so callers fail fast, then lets one trial call through."""
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class KoboldClient:
+    """Keep-alive, connection-pooled KoboldAI client with per-call deadlines, retries with
+    jitter, a circuit breaker and a fallback narration."""
+    GENERATE_PATH = "/api/v1/generate"
+    STREAM_PATH = "/api/extra/generate/stream"
+    ABORT_PATH = "/api/extra/abort"
+    FALLBACK_NARRATION = "The world around you is quiet for a moment..."
+    ABORT_TIMEOUT = 5.0
+    ERRORS = (OSError, ValueError, KeyError, IndexError)  # http.client errors arrive as ConnectionError
+
+    def __init__(self, endpoint=KOBOLD_ENDPOINT, pool_size=8, deadline=20.0, retries=2, backoff=0.25, breaker=None):
+        host, _, port = endpoint.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=2048)
+        self.counters = {'requests': 0, 'errors': 0, 'timeouts': 0, 'retries': 0,
+                         'fallbacks': 0, 'connections_opened': 0, 'connections_reused': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _acquire(self, timeout):
+        try:
+            conn = self._idle.get_nowait()
+            self._count('connections_reused')
+        except queue.Empty:
+            import http.client
+
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+            self._count('connections_opened')
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _release(self, conn, reusable):
+        if reusable:
+            try:
+                self._idle.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.close()
 
-    def __init__(self):
-    
-        self.game_state = GameState()
-        self.state_manager = StateManager(self.game_state)
-        self.event_queue = []
-        self.locations = { #Simplified locations for demonstration
-            "city1": {'name': "City 1", 'landmarks': ["Landmark 1", "Landmark 2"], 'events': ["Event 1"]},
-            "city2": {'name': "City 2", 'landmarks': ["Landmark 3", "Landmark 4"], 'events': ["Event 2"]},
+    @staticmethod
+    @contextlib.contextmanager
+    def _http_errors():
+        # Callers only need to catch ERRORS, so http.client stays out of module import
+        import http.client
+
+        try:
+            yield
+        except http.client.HTTPException as e:
+            raise ConnectionError(f"KoboldAI HTTP error: {type(e).__name__}: {e}") from e
+
+    def _post(self, conn, path, payload):
+        with self._http_errors():
+            conn.request("POST", path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+            return conn.getresponse()
+
+    def _post_json(self, path, payload, timeout):
+        conn = self._acquire(timeout)
+        reusable = False
+        try:
+            response = self._post(conn, path, payload)
+            with self._http_errors():
+                body = response.read()
+            if response.status != 200:
+                raise ConnectionError(f"KoboldAI request failed with status {response.status}")
+            reusable = not response.will_close
+            return json.loads(body)
+        finally:
+            self._release(conn, reusable)
+
+    def expires_at(self, deadline: float = None) -> float:
+        """Monotonic time a call started now must finish by; share it across related calls."""
+        return time.monotonic() + (deadline or self.deadline)
+
+    def generate(self, prompt: str, max_length: int = None, deadline: float = None, expires: float = None) -> str:
+        """Blocking generation that never takes longer than the deadline (or runs past an
+        `expires` time from expires_at()); returns the fallback narration on failure or while
+        the circuit is open."""
+        if not self.breaker.allow():
+            self._count('fallbacks')
+            return self.FALLBACK_NARRATION
+
+        payload = {'prompt': prompt}
+        if max_length:
+            payload['max_length'] = max_length
+        expires = expires or self.expires_at(deadline)
+        for attempt in range(self.retries + 1):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            started = time.monotonic()
+            self._count('requests')
+            try:
+                text = self._post_json(self.GENERATE_PATH, payload, remaining)['results'][0]['text']
+                self.latencies.append(time.monotonic() - started)
+                self.breaker.record_success()
+                return text
+            except self.ERRORS as e:
+                self._count('timeouts' if isinstance(e, TimeoutError) else 'errors')
+            if attempt < self.retries:
+                self._count('retries')
+                time.sleep(max(0.0, min(expires - time.monotonic(),
+                                        self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))))
+
+        self.breaker.record_failure()
+        self._count('fallbacks')
+        return self.FALLBACK_NARRATION
+
+    def stream(self, prompt: str, max_length: int = None, deadline: float = None, expires: float = None):
+        """Yield tokens from the server-sent-events endpoint. Closing the generator early aborts
+        generation. The deadline bounds the whole call, including the abort: every read gets
+        only the time that is left."""
+        if not self.breaker.allow():
+            raise ConnectionError("KoboldAI circuit is open")
+        import uuid
+
+        genkey = f"KCPP{uuid.uuid4().hex[:8]}"
+        payload = {'prompt': prompt, 'genkey': genkey}
+        if max_length:
+            payload['max_length'] = max_length
+
+        started = time.monotonic()
+        expires = expires or self.expires_at(deadline)
+        self._count('requests')
+        conn = self._acquire(max(0.001, expires - started))
+        finished = False
+        try:
+            try:
+                with self._http_errors():
+                    conn.request("POST", self.STREAM_PATH, body=json.dumps(payload),
+                                 headers={'Content-Type': 'application/json'})
+                    sock = conn.sock
+                    response = conn.getresponse()
+                if response.status != 200:
+                    raise ConnectionError(f"Streaming request failed with status {response.status}")
+            except self.ERRORS as e:
+                self._count('timeouts' if isinstance(e, TimeoutError) else 'errors')
+                self.breaker.record_failure()
+                raise
+            try:
+                for raw_line in self._lines(response, sock, expires):
+                    line = raw_line.decode('utf-8', errors='replace').strip()
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[5:])
+                    if event.get('token'):
+                        yield event['token']
+                    if event.get('finish_reason'):
+                        break
+            except GeneratorExit:
+                # Closed by the caller after a token, e.g. at its word budget: the server is healthy
+                self.latencies.append(time.monotonic() - started)
+                self.breaker.record_success()
+                raise
+            except self.ERRORS as e:
+                if not isinstance(e, TimeoutError):  # _lines already counted timeouts
+                    self._count('errors')
+                self.breaker.record_failure()
+                raise
+            finished = True
+            self.latencies.append(time.monotonic() - started)
+            self.breaker.record_success()
+        finally:
+            # A partly read event stream can't be reused for the next request
+            self._release(conn, False)
+            if not finished:
+                self.abort(genkey, expires)
+
+    def _lines(self, response, sock, expires):
+        while True:
+            remaining = expires - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError("KoboldAI stream deadline exceeded")
+                sock.settimeout(remaining)
+                with self._http_errors():
+                    line = response.readline()
+            except TimeoutError:
+                self._count('timeouts')
+                raise
+            if not line:
+                return
+            yield line
+
+    def abort(self, genkey: str, expires: float = None) -> bool:
+        timeout = self.ABORT_TIMEOUT if expires is None else min(self.ABORT_TIMEOUT, expires - time.monotonic())
+        if timeout <= 0:
+            return False
+        try:
+            self._post_json(self.ABORT_PATH, {'genkey': genkey}, timeout=timeout)
+            return True
+        except self.ERRORS:
+            return False
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            'pool_idle': self._idle.qsize(),
+            'pool_size': self.pool_size,
+            'circuit': self.breaker.state,
+            'latency_ms': {name: percentile(latencies, fraction) * 1000
+                           for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))},
         }
 
-        self.game_state.initialize_core_objects()
-        self.core_objects['kobold_ai'] = Core.KoboldAIIntegration(self.game_state, endpoint="127.0.0.1:5001")
-        # Initialize Core objects with game_state. Order is now important.
 
-        try: #Handle kobold initialization error.
-            initial_narration = self.game_state.kobold_ai.generate_narration(self.game_state, "The game begins...")
-        except (AttributeError, ConnectionError) as e:
-            print(f"Error initializing KoboldAI: {e}")
-            initial_narration = "Welcome to the adventure!"
+def limit_words(chunks, max_words: int):
+    """Yield chunks until max_words words have been produced, then close the source."""
+    words = 0
+    in_word = False
+    try:
+        for chunk in chunks:
+            for i, char in enumerate(chunk):
+                if char.isspace():
+                    in_word = False
+                elif not in_word:
+                    in_word = True
+                    words += 1
+                    if words > max_words:
+                        if chunk[:i].strip():
+                            yield chunk[:i].rstrip()
+                        return
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+class TerminalRenderer:
+    """Retained-mode renderer for the adventure box.
+
+    On a terminal the frame is pinned to the top rows, and the area below it is a scroll
+    region for narration and prompts. Each render repaints only the rows that differ from the
+    previous frame, in one buffered write. Without a terminal, only frames that changed are
+    written. A disabled renderer does nothing, for headless runs. On a terminal, lines are
+    clipped to its width, so each line takes exactly one row.
+    """
+
+    def __init__(self, stream=None, enabled=True, ansi=None, width=None):
+        self.stream = stream or sys.stdout
+        self.enabled = enabled
+        self.ansi = self.stream.isatty() if ansi is None else ansi
+        self.width = width  # columns; the terminal's own width when None
+        self.previous = None
+
+    def invalidate(self):
+        self.previous = None
+
+    def render(self, lines):
+        if not self.enabled:
+            return
+        if self.ansi:
+            lines = self._clip(lines)
+        if lines == self.previous:
+            return
+        if not self.ansi:
+            output = "\n".join(lines) + "\n"
+        elif self.previous is None or len(lines) != len(self.previous):
+            output = self._full_frame(lines)
+        else:
+            output = self._changed_rows(lines)
+        self.previous = list(lines)
+        self.stream.write(output)
+        self.stream.flush()
+
+    def _clip(self, lines):
+        import shutil
+
+        width = self.width or shutil.get_terminal_size().columns
+        return [line[:width] for line in lines]
+
+    def _full_frame(self, lines):
+        # Clear, paint the frame, then confine scrolling to the rows below it
+        height = len(lines)
+        return ("\x1b[r\x1b[H\x1b[2J" + "\n".join(lines)
+                + f"\x1b[{height + 1};r\x1b[{height + 1};1H")
+
+    def _changed_rows(self, lines):
+        parts = ["\x1b7"]  # Save the cursor in the scroll region
+        for row, (line, old_line) in enumerate(zip(lines, self.previous), start=1):
+            if line != old_line:
+                parts.append(f"\x1b[{row};1H\x1b[2K{line}")
+        parts.append("\x1b8")
+        return "".join(parts)
+
+    def close(self):
+        if self.enabled and self.ansi and self.previous is not None:
+            self.stream.write("\x1b[r")
+            self.stream.flush()
+        self.previous = None
+
+
+class NarrationBatcher:
+    """Coalesces concurrent narration prompts into batches for the KoboldAI backend.
+
+    Prompts are collected until max_batch are waiting or window seconds have passed since
+    the first one, then sent together; each caller gets its own result back through a Future.
+    """
+
+    def __init__(self, generate_batch, window=0.02, max_batch=8):
+        self.generate_batch = generate_batch  # list of prompts -> list of narrations
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.prompts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
-        self.game_state.user_profile['current_narration'] = initial_narration
-        # Initialize the rest of the Core objects AFTER KoboldAI and current_narration
-        self.game_state.map_generator = Core.MapGenerator(self.game_state)
-        self.game_state.narrator = Core.Narrator(self.game_state)
-        self.game_state.encounter_manager = Core.EncounterManager(self.game_state)
-        self.game_state.game_manager = Core.GameManager(self.game_state)
-        self.game_state.game_handler = Core.GameHandler(self.game_state)
-        self.game_state.emotional_state_tracker = Core.EmotionalStateTracker(self.game_state)
-        self.game_state.communication_system = Core.CommunicationSystem(self.game_state)
-        self.game_state.game_world = Core.GameWorld(self.game_state)
-        self.game_state.skillset = Core.Skillset(self.game_state)
-        self.game_state.player = Core.Player("You")
+    @staticmethod
+    def concurrent(narrate, max_workers=8):
+        """Batch function that sends a batch's prompts to the server together, for backends
+        that batch concurrent requests rather than taking a list of prompts."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        return lambda prompts: list(executor.map(narrate, prompts))
+
+    def submit(self, prompt: str) -> "Future":
+        from concurrent.futures import Future
+
+        future = Future()
+        self._queue.put((prompt, future))
+        return future
+
+    def narrate(self, prompt: str, timeout=None) -> str:
+        return self.submit(prompt).result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.prompts / self.batches if self.batches else 0.0
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Finish this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            self.batches += 1
+            self.prompts += len(batch)
+            try:
+                results = list(self.generate_batch([prompt for prompt, _ in batch]))
+                if len(results) != len(batch):
+                    raise ValueError(f"Batch function returned {len(results)} narrations for {len(batch)} prompts")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                # Every caller gets an answer; a pending future would block its session forever
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
 
 
+class NarrationPipeline:
+    """Background narration worker used by the asyncio game loop."""
+    _DONE = object()
+
+    def __init__(self, narrate, on_chunk):
+        # narrate(text) runs on the loop thread and returns (chunks, finish). The chunks are pulled
+        # in worker threads; on_chunk renders each one and finish(narration) gets their text, both
+        # back on the loop thread
+        self.narrate = narrate
+        self.on_chunk = on_chunk
+        self.queue = None
+        self.worker = None
+
+    async def start(self):
+        import asyncio
+
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    def submit(self, text: str):
+        self.queue.put_nowait(text)
+
+    async def drain(self):
+        if self.queue:
+            await self.queue.join()
+
+    async def stop(self):
+        import asyncio
+
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def _run(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await self._stream(text)
+            except Exception as e:
+                print(f"Error generating narration: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _stream(self, text: str):
+        # Pull each chunk in a worker thread so the event loop keeps accepting input
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        chunks, finish = self.narrate(text)
+        chunks, received = iter(chunks), []
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, self._DONE)
+            if chunk is self._DONE:
+                break
+            received.append(chunk)
+            self.on_chunk(chunk)
+        finish("".join(received))
+
+
+class Interface:
+    GAME_TITLE = "Text Adventure Game"
+    EXIT_CMD = "exit"
+    MAX_NARRATION_WORDS = 300
+    BINARY_SAVES = os.environ.get("GAME_SAVE_FORMAT", "json") == "binary"
+    SAVE_PATH = "save_game.bin" if BINARY_SAVES else "save_game.json"
+    AUTOSAVE_EVERY_TURN = True
+    STATE_HISTORY_DEPTH = 1000
+    EVENTS_PER_TICK = 100
+    MAX_THOUGHTS_TOKENS = 128
+    STARTUP_SERVICES = ('kobold_ai', 'map_generator', 'narrator', 'game_handler')
+    RECENT_THOUGHTS = 5
+    PAGE_SIZE = 20
+    NARRATION_DEADLINE = float(os.environ.get("KOBOLD_DEADLINE", "20"))
+    ASYNC_LOOP = os.environ.get("GAME_ASYNC_LOOP", "0") == "1"
+
+    def __init__(self, save_path=None, services=None, stream_narration=True, render=None):
+    
+        self.game_state = GameState(service_overrides=services)
+        if render is None:
+            render = os.environ.get("GAME_NO_RENDER", "0") != "1"
+        self.renderer = TerminalRenderer(enabled=render)
+        self.narration_stream = KoboldClient(KOBOLD_ENDPOINT, deadline=self.NARRATION_DEADLINE) if stream_narration else None
+        self.profiler = PROFILER
+        self.save_engine = SaveEngine(save_path or self.SAVE_PATH, binary=self.BINARY_SAVES)
+        self.game_state.attach_journals(f"{self.save_engine.path}.chunks")
+        self.state_manager = StateManager(self.game_state, max_history=self.STATE_HISTORY_DEPTH)
+        self.event_queue = EventScheduler(clock=lambda: self.game_state.user_profile.time)
+        self.event_queue.register('encounter', self.handle_encounter)
+        self.event_queue.register('quest', self.handle_quest_update)
+        self.event_queue.register('story', self.advance_story)
+        self.content = get_content_registry()
+        self.locations = self.content.locations
+        self.world = get_spatial_index()
+
+        # Build the Core objects the first turn needs, independent ones in parallel; the rest on first use
+        self.game_state.services.warm_up(self.STARTUP_SERVICES)
+        if os.environ.get("GAME_STARTUP_REPORT") == "1":
+            print(self.game_state.services.report())
+
         self.init_memory()
 
-        
+    def __getattr__(self, name):
+        # Core objects live on the game state; expose them here for the older call sites
+        game_state = self.__dict__.get('game_state')
+        if game_state is not None and name in game_state.services:
+            return game_state.services.get(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
     def init_memory(self):
         initial_location = self.game_state.user_profile['current_location']  # Access from game_state
-        self.game_state.map_generator.initialize_map(initial_location)  # Initialize map here, using game_state
-        self.game_state.narrator.set_scene("the starting area.") #Set initial scene using game_state.
+        map_description = self.game_state.initialize_map(initial_location)  # Initialize map once, using game_state
+        self.game_state.narrator.set_scene("the starting area " + map_description) #Set initial scene using game_state.
 
         self.game_state.last_location = (initial_location['town'], 'Unknown')
 
-                # Initialize current_narration using the now-available self.game_state.kobold_ai
+        # Initialize current_narration using the now-available self.game_state.kobold_ai
         if self.game_state.kobold_ai:  # Check if KoboldAI is available
-            initial_narration = self.game_state.kobold_ai.generate_narration(self.game_state, "The game begins...") # Pass the game state object
+            try:
+                initial_narration = self.game_state.cached_narration(self.game_state.kobold_ai, "The game begins...") # Pass the game state object
+            except (AttributeError, ConnectionError) as e:
+                print(f"Error initializing KoboldAI: {e}")
+                initial_narration = "Welcome to the adventure!"
         else:
             initial_narration = "Welcome to the text adventure!"  # Fallback if KoboldAI is not available
 
         self.game_state.user_profile['current_narration'] = initial_narration
 
-
-
-        # ... rest of the method from the previous response...
-        #FIXED: Use the correct dictionary structure for location
-        initial_location = self.game_state.user_profile['current_location']  # Access from game_state
-         # Use game_state
-        self.game_state.narrator.set_scene("the starting area " + self.game_state.map_generator.initialize_map(initial_location) ) 
-
     def display_menu(self): #Improved to properly start the adventure and include adventure selection logic
 
         print("Available Adventures:")
-        # Example adventures. Replace with your actual adventures
-        adventures = [
-            {"title": "The Lost Treasure", "starting_location": {"country": "Eldoria", "town": "Silverwood", "latitude": 34.5, "longitude": -118.2}},
-            {"title": "The Mystery of the Missing Scientist", "starting_location": {"country": "Atlantis", "town": "Aquatica", "latitude": 25.5, "longitude": -80.2}},
-           #Add more as needed
-        ]
+        adventures = self.content.adventures
 
         for i, adventure in enumerate(adventures):
             print(f"{i+1}. {adventure['title']}")
@@ -257,7 +2683,7 @@ class Interface:
               if 1 <= choice <= len(adventures):
                   adventure_data = adventures[choice-1]
                   self.start_adventure(adventure_data) #Pass the selected adventure data!
-                  self.game_loop() #Start the game loop after adventure selection
+                  self.run_game_loop() #Start the game loop after adventure selection
                   break #Exit loop after starting game
               else:
                   print("Invalid choice. Please select a valid adventure number.")
@@ -275,7 +2701,7 @@ class Interface:
             print(f"No NPC named '{npc_name}' found.")
 
     def time_flow(self):
-        self.game_state.user_profile['time'] += 0.0005 # Simulating time within the game
+        self.game_state.user_profile.time += 0.0005 # Simulating time within the game
 
     def show_profile(self, character=None):
         if character is None:
@@ -298,35 +2724,44 @@ class Interface:
         """
 
     def calculate_time_passage(self, action):
-        time_units = {
-            'year': 365,
-            'month': 30,
-            'week': 7,
-            'day': 1,
-            'hour': 1 / 24,
-            'minute': 1 / 1440,
-            'second': 1 / 86400,
-        }
-
-        pattern = r'(\d+)\s*(year|month|week|day|hour|minute|second)s?'
-        total_time = sum(int(num) * time_units[unit] for num, unit in re.findall(pattern, action))
-        return total_time
-
-    def travel_method(self, choice):
-        methods = {
-            1: ("Train", 30, 3),
-            2: ("Plane", 50, 5),
-            3: ("Boat", 20, 4)
-        }
-        
-        method_data = methods.get(choice)
+        return sum(int(num) * TIME_UNITS[unit] for num, unit in TIME_PASSAGE_PATTERN.findall(action))
+
+    TRAVEL_METHODS = {
+        # choice: (name, base cost, base hours, cost per km, km/h)
+        1: ("Train", 30, 3, 0.05, 120),
+        2: ("Plane", 50, 5, 0.10, 700),
+        3: ("Boat", 20, 4, 0.04, 35),
+    }
+
+    def _current_coordinates(self):
+        location = self.game_state.user_profile.get('current_location')
+        if not isinstance(location, dict) or location.get('latitude') is None:
+            return None
+        coordinates = location['latitude'], location['longitude']
+        # 0.0/0.0 is the placeholder for places without coordinates, not a real origin
+        return None if coordinates == (0.0, 0.0) else coordinates
+
+    def travel_method(self, choice, destination=None):
+        method_data = self.TRAVEL_METHODS.get(choice)
         if not method_data:
             return "Invalid travel method"
             
-        method, cost, time = method_data
+        method, cost, time, cost_per_km, speed = method_data
+        place = self.world.find(destination) if destination else None
+        if destination and not place:
+            return f"Unknown destination: {destination}"
+        origin = self._current_coordinates()
+        if place and origin:
+            distance = haversine_km(*origin, place.latitude, place.longitude)
+            cost = round(cost + distance * cost_per_km)
+            time = round(time + distance / speed, 1)
+
         if self.game_state.user_profile['money'] >= cost:
             self.game_state.user_profile['money'] -= cost
-            self.game_state.user_profile['time'] += time
+            self.game_state.user_profile.time += time
+            if place:
+                self.game_state.update_location(place.as_location())
+                return f"Traveled by {method} to {place.name}. Cost: {cost}, Time taken: {time} hours"
             return f"Traveled by {method}. Cost: {cost}, Time taken: {time} hours"
         
         return "Insufficient funds for travel"
@@ -353,7 +2788,7 @@ class Interface:
         
         location_data = self.locations.get(city)
         if not location_data:
-            return "Location not found"
+            return self.explore_place(city)
             
         self.game_state.update_location({
             'country': location_data['name'],
@@ -369,13 +2804,35 @@ class Interface:
         self.game_state.narrator.handle_narration(narration)
         return narration
 
+    def explore_place(self, name):
+        place = self.world.find(name)
+        if not place:
+            return "Location not found"
+
+        self.game_state.update_location(place.as_location())
+        landmarks = ', '.join(nearby.name for _, nearby in
+                              self.world.nearby(place.latitude, place.longitude, 10, kind='landmark')[:5]) or "none nearby"
+        narration = f"Exploring {place.name}. Landmarks: {landmarks}."
+        self.game_state.narrator.handle_narration(narration)
+        return narration
+
     def show_story(self): #Updated to use game_state
         current_location_data = self.game_state.user_profile.get('current_location', {}) #Access safely through game_state
         loc = current_location_data.get('town', 'an unknown place') #Access safely from the current_location dictionary.
         narration = f"You are currently in {loc}. What adventures await?"
         self.game_state.narrator.handle_narration(narration)  # Use game_state.
+        recent = self.game_state.journals['story'].tail(3)
+        if recent:
+            narration += "\nRecently: " + " ".join(recent)
         return narration
 
+    def show_story_log(self, page=1):
+        story = self.game_state.journals['story']
+        pages = max(1, -(-len(story) // self.PAGE_SIZE))
+        lines = [f"Story log, page {page} of {pages}:"]
+        lines += [f"  - {entry}" for entry in story.page(page, self.PAGE_SIZE)]
+        return "\n".join(lines)
+
     def generate_daily_scenario(self): #Updated to use game_state
         current_location_data = self.game_state.user_profile.get('current_location', {})  # Access through game_state
         loc = current_location_data.get('town', 'an unknown place')  # Access from the location data
@@ -388,56 +2845,78 @@ class Interface:
         ]
         new_activity = random.choice(activities)
         self.game_state.user_profile['activity'] = new_activity
-        self.game_state.user_profile['thoughts'] += new_activity
+        # The journal keeps every thought; the profile shows only the latest few
+        thoughts = self.game_state.journals['thoughts']
+        thoughts.append(new_activity)
+        self.game_state.user_profile['thoughts'] = trim_to_tokens(
+            "".join(thoughts.tail(self.RECENT_THOUGHTS)), self.MAX_THOUGHTS_TOKENS, keep_end=True)
+        self.game_state.context_builder.record(f"You{new_activity}")
         narration = f"Daily adventure: You{new_activity}"
         self.narrator.handle_narration(narration)
         return narration
 
-    def save_game(self):
+    def save_game(self, quiet=False):
+        profile = self.game_state.user_profile
         save_data = {
-            'user_profile': self.game_state.user_profile,
-            'story_progress': self.game_state.story_progress,
-            'npcs': self.game_state.npcs,
-            'active_quests': self.game_state.active_quests,
+            # Journal-backed fields are saved through their own small 'journals' section
+            'user_profile': {key: value for key, value in profile.to_dict().items() if not isinstance(value, JournalStore)},
+            'journals': {name: journal.state() for name, journal in self.game_state.journals.items()},
+            # Sections still undecoded since load are passed through as they were stored
+            **{key: getattr(GameState, key).peek(self.game_state)
+               for key in ('story_progress', 'npcs', 'active_quests', 'lore_database')},
             'game_state': self.game_state.game_state,
             'locked_mode': self.game_state.locked_mode
         }
 
         try:
-            with open('save_game.json', 'w', encoding='utf-8') as f:
-                json_data = json.dumps(save_data, indent=2)
-                if len(json_data) > self.SAVE_TOKEN_LIMIT:
-                    json_data = json_data[:self.SAVE_TOKEN_LIMIT]
-                f.write(json_data)
-            self.game_state.narrator.handle_narration("Game saved successfully.")
+            self.save_engine.save(save_data)
+            if not quiet:
+                self.game_state.narrator.handle_narration("Game saved successfully.")
             return True
-        except IOError as e:
+        except (IOError, TypeError, ValueError) as e:
             self.game_state.narrator.handle_narration(f"Save failed: {str(e)}")
             return False
 
+    def autosave(self):
+        if self.AUTOSAVE_EVERY_TURN:
+            self.save_game(quiet=True)
+
     def load_game(self):
         try:
-            with open('save_game.json', 'r', encoding='utf-8') as f:
-                load_data = json.load(f)
+            load_data = self.save_engine.load()
                 
             # Validate required keys
             required_keys = ['user_profile', 'story_progress', 'npcs', 'active_quests']
             if not all(key in load_data for key in required_keys):
                 raise ValueError("Save file is missing required data")
                 
-            # Update game state with loaded data
-            self.game_state.user_profile.update(load_data['user_profile'])
-            self.game_state.story_progress = load_data['story_progress']
-            self.game_state.npcs = load_data['npcs']
-            self.game_state.active_quests = load_data['active_quests']
+            # Update game state with loaded data; only the profile is decoded up front
+            loaded_profile = dict(load_data['user_profile'])
+            legacy_clues = loaded_profile.pop('clues', None)  # Saves from before the journal store
+            self.game_state.user_profile.update(loaded_profile)
+            journals = self.game_state.journals
+            if 'journals' in load_data:
+                for name, state in load_data['journals'].items():
+                    if name in journals:
+                        journals[name].restore(state)
+            else:
+                # The save has no journals, so nothing from the live session carries over
+                for journal in journals.values():
+                    journal.clear()
+                if isinstance(legacy_clues, list):
+                    journals['clues'].extend(legacy_clues)
+            self.game_state.story_summary.clear()  # reseeded from the loaded adventure_summary
+            for key in ('story_progress', 'npcs', 'active_quests', 'lore_database'):
+                if key in load_data:
+                    setattr(self.game_state, key, deferred_section(load_data, key))
             
             # Reinitialize necessary components
-            self.game_state.map_generator.initialize_map(self.game_state.user_profile['current_location'])
+            self.game_state.initialize_map(self.game_state.user_profile['current_location'])
             
             self.game_state.narrator.handle_narration("Game loaded successfully.")
             return True
             
-        except (json.JSONDecodeError, IOError, ValueError) as e:
+        except (json.JSONDecodeError, IOError, ValueError, TypeError, struct.error, zlib.error) as e:
             self.game_state.narrator.handle_narration(f"Load failed: {str(e)}")
             return False
 
@@ -446,6 +2925,7 @@ class Interface:
         try:
             # Save final game state
             self.save_game()
+            self.game_state.save_caches()
             
             # Clean up core objects
             for name, obj in self.game_state.core_objects.items():
@@ -457,6 +2937,7 @@ class Interface:
                         
             # Reset game state
             self.game_state.game_handler.in_game = False
+            self.renderer.close()
             
         except Exception as e:
             print(f"Error during cleanup: {e}")
@@ -464,48 +2945,55 @@ class Interface:
             print("Game resources cleaned up.")
 
     def display_adventure_interface(self, width=80, title=None, options="Profile, Explore, Save Game, Load Game, Exit"):
+        if not self.renderer.enabled:
+            return
         title = title or self.GAME_TITLE
         icons = ["🗺️", "⚔️", "🛡️", "🌟", "🏰", "🐉", "💎", "🌲", "🚀", "🎩"]
 
         selected_options = [opt.strip() for opt in options.split(",") if opt.strip()]
 
+        def icon_for(text):
+            # Stable per label, so unchanged regions render identically between frames
+            return icons[zlib.crc32(text.encode('utf-8')) % len(icons)]
+
         def centered_content(content, total_width):
             padding = (total_width - len(content)) // 2
             return " " * padding + content + " " * padding
 
         def bordered_line(content, width):
-            return f"| {content.ljust(width - 4)} |"
+            # Clipped, never wrapped: a wrapped row would shift every row below it on screen
+            return f"| {content[:width - 4].ljust(width - 4)} |"
 
         def create_box(title, content, width):
             lines = content.split("\n")
             box = ["+" + "-" * (width - 2) + "+"]
-            title_icon = random.choice(icons)
-            box.append(bordered_line(f"{title_icon} {title}", width))
+            box.append(bordered_line(f"{icon_for(title)} {title}", width))
             box.append("|" + "-" * (width - 2) + "|")
             for line in lines:
                 box.append(bordered_line(line.strip(), width))
             box.append("+" + "-" * (width - 2) + "+")
-            return "\n".join(box)
+            return box
 
-        options_display = [f"{random.choice(icons)} [{option}]" for option in selected_options]
+        options_display = [f"{icon_for(option)} [{option}]" for option in selected_options]
         options_line = bordered_line(" | ".join(options_display), width) if options_display else bordered_line("No Options Available", width)
         
         content_to_display = self.show_profile() if "Profile" in selected_options else self.show_story()
         
-        story_box = create_box("Current View", content_to_display, width)
-
-        print("+" + "-" * (width - 2) + "+")
-        print(bordered_line(centered_content(title, width - 4), width))
-        print("|" + "=" * (width - 2) + "|")
-        print(options_line)
-        print("|" + "=" * (width - 2) + "|")
-        print(story_box)
-        print("+" + "-" * (width - 2) + "+")
+        frame = [
+            "+" + "-" * (width - 2) + "+",
+            bordered_line(centered_content(title, width - 4), width),
+            "|" + "=" * (width - 2) + "|",
+            options_line,
+            "|" + "=" * (width - 2) + "|",
+            *create_box("Current View", content_to_display, width),
+            "+" + "-" * (width - 2) + "+",
+        ]
+        self.renderer.render(frame)
 
     def context_aware_encounters(self):
         player_status =self.game_state.user_profile
         if player_status['current_location'] == "starting area" and random.random() < 0.5:
-            self.map_generator.initialize_map(player_status['current_location'])
+            self.game_state.initialize_map(player_status['current_location'])
             self.narrator.handle_narration("A mysterious traveler offers a quest!")
         if random.random() < 0.3:
             self.narrator.handle_narration(f"You received a {random.choice(['unique item', 'lore discovery', 'character development opportunity'])}!")
@@ -529,7 +3017,7 @@ class Interface:
         plot_summary = adventure_data.get('plot_summary', "A mysterious adventure unfolds...")
 
         self.game_state.user_profile['current_location'] = current_location # Use the current_location *dictionary*, not just the country name.
-        self.game_state.map_generator.initialize_map(current_location)
+        self.game_state.initialize_map(current_location)
         self.game_state.user_profile['current_location'] = current_location
 
         if self.game_state.kobold_ai:
@@ -540,7 +3028,8 @@ class Interface:
             }
             self.game_state.kobold_ai.save_game_state_to_history(game_state_data)  # Corrected call
             kobold_context = {  #Create correct kobold_context
-                "user_profile": self.game_state.user_profile,
+                "user_profile": ContextBuilder.profile_slice(self.game_state.user_profile),
+                "history": self.game_state.context_builder.build(plot_summary),
                 "current_location": current_location,
                 "story_title": story_title,
                 "plot_summary": plot_summary
@@ -552,24 +3041,7 @@ class Interface:
     def _generate_episodic_content(self, user_input):
         """Enhanced story generation with full genre variety and method integration"""
 
-        genres = {
-            "detective": {"themes": ["noir", "procedural", "private eye", "true crime"]},
-            "scifi": {"themes": ["space opera", "cyberpunk", "time travel", "post-apocalyptic"]},
-            "romance": {"themes": ["rom-com", "drama", "historical", "contemporary"]},
-            "documentary": {"themes": ["nature", "historical", "biographical", "investigative"]},
-            "horror": {"themes": ["psychological", "supernatural", "slasher", "cosmic"]},
-            "comedy": {"themes": ["sitcom", "dark comedy", "satire", "slapstick"]},
-            "drama": {"themes": ["medical", "legal", "family", "political"]},
-            "fantasy": {"themes": ["high fantasy", "urban", "magical realism", "mythological"]},
-            "thriller": {"themes": ["psychological", "action", "conspiracy", "espionage"]},
-            "western": {"themes": ["classical", "modern", "space western", "neo-western"]},
-            "sports": {"themes": ["underdog", "comeback", "team building", "competition"]},
-            "musical": {"themes": ["broadway", "rock opera", "dance", "biographical"]},
-            "adventure": {"themes": ["exploration", "treasure hunt", "survival", "journey"]},
-            "war": {"themes": ["historical", "futuristic", "resistance", "espionage"]},
-            "crime": {"themes": ["heist", "mob", "white collar", "international"]},
-            "supernatural": {"themes": ["paranormal", "mythical", "urban fantasy", "occult"]}
-        }
+        content = self.content
 
         # Access current_location as a dictionary
         current_location = self.game_state.user_profile['current_location']
@@ -584,13 +3056,14 @@ class Interface:
             self.narrator.handle_narration(travel_narrative)
 
 
-        if 'current_genre' not in self.game_state.story_progress or random.random() < 0.2:  # Corrected: "not in"
-            self.game_state.story_progress['current_genre'] = random.choice(list(genres.keys()))
+        # A new game starts with no genre, and a saved one may name a genre the packs no longer have
+        if self.game_state.story_progress.get('current_genre') not in content.genres or random.random() < 0.2:
+            self.game_state.story_progress['current_genre'] = random.choice(content.genre_names)
             self.game_state.story_progress['episode_number'] = 1
             self.game_state.story_progress['season'] = 1
 
         genre = self.game_state.story_progress['current_genre']
-        theme = random.choice(genres[genre]["themes"])
+        theme = random.choice(content.themes(genre))
         episode = self.game_state.story_progress['episode_number']
         season = self.game_state.story_progress['season']
 
@@ -624,7 +3097,7 @@ class Interface:
         if self.game_state.story_progress['episode_number'] > 12:  # Corrected: Indentation and colon
             self.game_state.story_progress['season'] += 1
             self.game_state.story_progress['episode_number'] = 1
-            new_genre = random.choice([g for g in genres.keys() if g != genre])
+            new_genre = random.choice([g for g in content.genre_names if g != genre])
             self.game_state.story_progress['current_genre'] = new_genre
             self.narrator.handle_narration(f"Season {season} finale! Next season will feature {new_genre} stories!")
 
@@ -649,15 +3122,9 @@ class Interface:
         self.state_manager.update_state(updates)
         return updates
 
-    def process_events(self):
-        while self.event_queue:
-            event = self.event_queue.pop(0)
-            if event['type'] == 'encounter':
-                self.handle_encounter(event)
-            elif event['type'] == 'quest':
-                self.handle_quest_update(event)
-            elif event['type'] == 'story':
-                self.advance_story(event)
+    def process_events(self, max_events=None) -> int:
+        """Handle due events, at most max_events of them when processing in per-tick batches."""
+        return self.event_queue.process(max_events)
 
     def handle_encounter(self, encounter: dict):
         if not self.game_state.encounter_manager:
@@ -671,9 +3138,17 @@ class Interface:
         current_progress = self.game_state.user_profile['mysteryProgress']
         new_progress = min(100, current_progress + story_event.get('progress', 5))
         
+        # The summary is a bounded rolling history of story events rather than an ever-growing string
+        summary = self.game_state.story_summary
+        if not summary.recent and not summary.summary:
+            summary.record(self.game_state.user_profile['adventure_summary'])
+        if story_event.get('summary'):
+            self.game_state.journals['story'].append(story_event['summary'])
+            summary.record(story_event['summary'])
+            self.game_state.context_builder.record(story_event['summary'])
         updates = {
             'mysteryProgress': new_progress,
-            'adventure_summary': f"{self.game_state.user_profile['adventure_summary']} {story_event.get('summary', '')}"
+            'adventure_summary': summary.history_text()
         }
         
         self.state_manager.update_state(updates)
@@ -722,53 +3197,27 @@ class Interface:
         self.kobold_ai.save_game_state_to_history(game_state_data)
 
     def generate_story(self, country):
-        if country == "USA":
-            self.game_state.map_generator.initialize_map({"country": "USA", "town": "Anytown USA"})       
-            genre = "detective"
-            return {
-                "genre": genre,
-                "title": "The Great American Mystery",
-                "plot": "You're a freelance detective gathering clues across the city...",
-                "clues": self.generate_clues(),
-                "endings": ["success", "failure", "mystery unresolved"],
-                "random_encounters": self.generate_random_encounters()
-            }
-        elif country == "England":
-            self.game_state.map_generator.initialize_map({"country": "England", "town": "London"})  
-            genre = "sci-fi"
-            return {
-                "genre": genre,
-                "title": "The Sci-fi Chronicles",
-                "plot": "You find yourself in a futuristic England with high-tech mysteries...",
-                "clues": self.generate_clues(),
-                "endings": ["success", "tragedy", "happy ending"],
-                "random_encounters": self.generate_random_encounters()
-            }
-        else:
-            self.game_state.map_generator.initialize_map({"country": country, "town": "Generic Town"})
-            genre = "adventure"
-            return {
-                "genre": genre,
-                "title": "The Global Quest",
-                "plot": "You embark on a journey around the world...",
-                "clues": self.generate_clues(),
-                "endings": ["success", "failure", "mixed outcome"],
-                "random_encounters": self.generate_random_encounters()
-            }
+        template = self.content.story_for(country)
+        self.game_state.initialize_map({"country": country, "town": template["town"]})
+        return {
+            "genre": template["genre"],
+            "title": template["title"],
+            "plot": template["plot"],
+            "clues": self.generate_clues(),
+            "endings": list(template["endings"]),
+            "random_encounters": self.generate_random_encounters()
+        }
+
+    def _content_context(self):
+        location = self.game_state.user_profile.get('current_location')
+        country = location.get('country') if isinstance(location, dict) else location
+        return self.game_state.story_progress.get('current_genre'), country
 
     def generate_clues(self):
-        return [
-            "A suspicious person was seen near the library.",
-            "A receipt found at the crime scene leads to a cafe.",
-            "Witnesses mentioned hearing a strange sound last night."
-        ]
+        return self.content.clues_for(*self._content_context())
 
     def generate_random_encounters(self):
-        return [
-            "You encounter a mysterious stranger in the alley.",
-            "Someone asks you for directions and seems suspicious.",
-            "You overhear a conversation about a recent theft."
-        ]
+        return self.content.encounters_for(*self._content_context())
 
     def display_story_intro(self, story):
         intro_narration = self.game_state.narrator.start_scene("You awaken in a mysterious land...")# Get intro from Narrator
@@ -787,13 +3236,14 @@ class Interface:
           | [Type 'exit' to leave the adventure]                 |
         """)
 
-    def show_progress(self):
-        clues_found = self.game_state.user_profile.get('clues', [])
-        total_clues = len(self.game_state.user_profile['clues'])
+    def show_progress(self, page=1):
+        clues_found = self.game_state.journals['clues']
+        total_clues = len(clues_found)
+        pages = max(1, -(-total_clues // self.PAGE_SIZE))
         clues_summary = f"{len(clues_found)} clue(s) collected out of {total_clues}.\n\n"
         
-        clues_summary += "Clues found:\n"
-        for clue in clues_found:
+        clues_summary += f"Clues found (page {page} of {pages}):\n"
+        for clue in clues_found.page(page, self.PAGE_SIZE):
             clues_summary += f"  - {clue}\n"
             
         return clues_summary + "\nHints:\n"  # You may want to implement the get_hints() method.
@@ -804,12 +3254,16 @@ class Interface:
         return outcome
 
     def travel_to_new_location(self):
-        destinations = ["USA", "England", "Japan", "Brazil", "Canada"]
-        new_country = random.choice(destinations)
-        self.game_state.user_profile['current_location'] = new_country
-        
-        new_location = {"country": new_country, "town": new_country} #Removed coordinates, no longer required.
-        self.game_state.map_generator.initialize_map(new_location) #Correct usage of game_state.
+        origin = self._current_coordinates()
+        candidates = self.world.route_candidates(*origin) if origin else []
+        if candidates:
+            new_location = random.choice(candidates)[1].as_location()
+        else:
+            new_country = random.choice(["USA", "England", "Japan", "Brazil", "Canada"])
+            new_location = {"country": new_country, "town": new_country}
+        new_country = new_location['country']
+        self.game_state.update_location(new_location)
+        self.game_state.initialize_map(new_location) #Correct usage of game_state.
         
         return self.display_adventure_interface(title="✈️ Traveling", options=f"""
           | You have traveled to {new_country}!               |
@@ -824,40 +3278,27 @@ class Interface:
         return "You have exited the adventure. Thank you for playing!"
 
     def on_command(self, input_):
-        commands = {
-            "show profile": self.show_profile,
-            "start game": self.start_interface,
-            "start story": lambda: self.start_story(),
-            "explore city2": lambda: self.explore_location("city2"),
-            "save game": self.save_game,
-            "load game": self.load_game,
-            "exit": lambda: self.exit_story(),
-            "start adventure": lambda: self.start_adventure(),
-            "generate daily scenario": self.generate_daily_scenario,
-            "next episode": lambda: self._generate_episodic_content(input_),
-            "story summary": lambda: self.show_progress(),
-            "explore": lambda: self.explore_location(self.game_state.user_profile['current_location']),
-        }
-
-        if input_.lower().strip() == "do nothing":
-            return "You spent time doing nothing."
-        
+        command = input_.strip()
         try:
-            choice = int(input_)
+            choice = int(command)
             return self.travel_method(choice)
         except ValueError:
             pass  # Continue to check commands
-            action = commands.get(input_.lower().strip())
-        
-        if action is None:
-            time_estimate = self.calculate_time_passage(input_) or 0.010
-            current_time =self.game_state.user_profile['time']
-            self.game_state.user_profile['time'] += time_estimate
-            return f"Time passed: from {current_time:.2f} to {self.game_state.user_profile['time']:.2f} hours."
-        
 
+        route = COMMAND_ROUTER.resolve(command)
+        # Free text that only starts like a command ("save the princess", "travel by foot
+        # for 3 hours") is an action, not a malformed command
+        if route is None or route.error:
+            return self.pass_time(input_)
 
-        return action() if action else "Command not recognized."
+        return route.invoke(self, input_)
+
+    def pass_time(self, action):
+        time_estimate = self.calculate_time_passage(action) or 0.010
+        profile = self.game_state.user_profile
+        current_time = profile.time
+        profile.time += time_estimate
+        return f"Time passed: from {current_time:.2f} to {profile.time:.2f} hours."
 
     def handle_user_input(self, raw_input: str) -> str:
         try:
@@ -865,76 +3306,56 @@ class Interface:
             
             if not sanitized_input:
                 return ErrorHandler.handle_game_error('input', "Empty input")
-                
-            if not InputValidator.validate_command(sanitized_input):
+
+            route = COMMAND_ROUTER.resolve(sanitized_input)
+            if route is None:
                 return ErrorHandler.handle_game_error('command', sanitized_input)
-                
-            command_parts = sanitized_input.split()
-            command = command_parts[0].lower()
-            args = command_parts[1:]
-            
-            return self.execute_command(command, args)
+
+            return route.invoke(self, sanitized_input)
             
         except Exception as e:
             return ErrorHandler.handle_game_error('data', str(e))
 
     def execute_command(self, command: str, args: list) -> str:
-        command_handlers = {
-            'profile': self.show_profile,
-            'explore': lambda: self.explore_location(args[0]) if args else "Specify location",
-            'travel': lambda: self.handle_travel(args),
-            'interact': lambda: self.interact_with_npc(args[0]) if args else "Specify NPC",
-            'inventory': self.show_inventory,
-            'help': self.show_help
-        }
-        
-        handler = command_handlers.get(command)
-        if not handler:
+        route = COMMAND_ROUTER.resolve(" ".join([command, *args]))
+        if route is None:
             return ErrorHandler.handle_game_error('command', command)
             
         try:
-            return handler()
+            return route.invoke(self)
         except Exception as e:
             return ErrorHandler.handle_game_error('data', str(e))
 
-    def handle_travel(self, args: list) -> str:
-        if not args:
-            return "Specify travel method (1-3)"
-            
-        is_valid, choice = InputValidator.validate_number(args[0], 1, 3)
-        if not is_valid:
-            return "Invalid travel method number"
-            
-        return self.travel_method(choice)
+    def do_nothing(self):
+        return "You spent time doing nothing."
 
-    def update_game_progress(self, action_result: dict) -> dict:
-        updates = {
-            'time': self.game_state.user_profile['time'] + action_result.get('time_cost', 0),
-            'money': self.game_state.user_profile['money'] + action_result.get('money_change', 0),
-            'mysteryProgress': self.game_state.user_profile['mysteryProgress'] + action_result.get('progress', 0)
-        }
-        
-        self.state_manager.update_state(updates)
-        return updates
+    def explore_command(self, location=None):
+        if location is None:
+            location = self.game_state.user_profile['current_location'].get('town')
+        return self.explore_location(location)
+
+    def show_inventory(self):
+        profile = self.game_state.user_profile
+        return f"Gear: {', '.join(profile['gear']) or 'No gear'}\nCrew: {', '.join(profile['crew']) or 'No crew'}"
+
+    def show_help(self):
+        return "Available commands:\n" + COMMAND_ROUTER.help_text()
 
-    def process_events(self):
-        while self.event_queue:
-            event = self.event_queue.pop(0)
-            if event['type'] == 'encounter':
-                self.handle_encounter(event)
-            elif event['type'] == 'quest':
-                self.handle_quest_update(event)
-            elif event['type'] == 'story':
-                self.advance_story(event)
 
     # First batch of fixes - Game Loop and State Management
     def game_loop(self):
+        span = self.profiler.span
         try:
             while self.game_state.game_handler.in_game:
-                self.time_flow()
-                self.display_adventure_interface()
+                with span("time_flow"):
+                    self.time_flow()
+                with span("process_events"):
+                    self.process_events(self.EVENTS_PER_TICK)
+                with span("display_adventure_interface"):
+                    self.display_adventure_interface()
             
-                user_input = input("What would you like to do? ").lower().strip()
+                raw_input = input("What would you like to do? ").strip()
+                user_input = raw_input.lower()
             
                 if user_input == self.EXIT_CMD:
                     self.game_state.narrator.handle_narration("Exiting the adventure.")
@@ -956,8 +3377,8 @@ class Interface:
                         print(f"No NPC found with the name '{npc_name}'")
                     continue
                 
-                # Travel handling with proper validation
-                if user_input.startswith("travel"):
+                # A bare "travel" asks for the method; "travel <n> [destination]" goes through the router
+                if user_input == "travel":
                     try:
                         print("Select travel method:\n1. Train\n2. Plane\n3. Boat")
                         choice = int(input("Enter number (1-3): "))
@@ -971,18 +3392,20 @@ class Interface:
                 
                 # Resource management with context managers
                 if user_input == "save game":
-                    self.save_game()
+                    with span("save_game"):
+                        self.save_game()
                 elif user_input == "load game":
                     self.load_game()
                 else:
-                    result = self.on_command(user_input)
+                    with span("on_command"):
+                        result = self.on_command(raw_input)
                     if isinstance(result, str) and result != "Command not recognized.":
                         if self.game_state.kobold_ai:
                             try:
-                                ai_narration = self.game_state.kobold_ai.get_response(self.game_state, result)
-                                truncated_narration = ai_narration[:self.MAX_NARRATION_WORDS]
-                                self.game_state.user_profile['current_narration'] = truncated_narration
-                                print(truncated_narration)
+                                with span("narration"):
+                                    for chunk in self.narration_chunks(result):
+                                        self._render_narration_chunk(chunk)
+                                print()
                             except Exception as e:
                                 print(f"Error generating narration: {e}")
                             
@@ -996,19 +3419,27 @@ class Interface:
                 if user_input.lower() == 'exit':
                     break
                     
-                result = self.handle_user_input(user_input)
+                with span("handle_user_input"):
+                    result = self.handle_user_input(user_input)
                 print(result)
                 
                 if self.game_state.kobold_ai and isinstance(result, str):
-                    narration = self.game_state.kobold_ai.get_response(self.game_state, result)
-                    print(narration[:self.MAX_NARRATION_WORDS])
+                    with span("narration"):
+                        for chunk in self.narration_chunks(result):
+                            self._render_narration_chunk(chunk)
+                    print()
+
+                with span("autosave"):
+                    self.autosave()
                     
         except KeyboardInterrupt:
                 print("\nSaving game...")
                 self.save_game()
+                self.game_state.save_caches()
                 self.game_state.game_handler.in_game = False
                 self.game_state.game_handler.save_game()
                 self.game_state.game_handler.close_files()
+                self.profiler.export()
                 print("Game saved. Exiting...")
                 exit()
 
@@ -1022,6 +3453,192 @@ class Interface:
     
 
 
+    def run_game_loop(self):
+        try:
+            if self.ASYNC_LOOP:
+                import asyncio
+
+                asyncio.run(self.game_loop_async())
+            else:
+                self.game_loop()
+        finally:
+            self.renderer.close()
+            self.game_state.save_caches()
+            self.profiler.export()
+
+    def narration_chunks(self, text):
+        """Yield narration for text as it becomes available."""
+        chunks, finish = self.open_narration(text)
+        received = []
+        for chunk in chunks:
+            received.append(chunk)
+            yield chunk
+        finish("".join(received))
+
+    def open_narration(self, text):
+        """Start narrating text; returns (chunks, finish).
+
+        The cache lookup and prompt are done here and finish(narration) records the result, so
+        both must run on the game thread: ContextBuilder is not thread-safe. Only the chunks,
+        which make no use of it, may be consumed in another thread.
+        """
+        kobold_ai = self.game_state.kobold_ai
+        if not kobold_ai:
+            return (), lambda narration: None
+        self.game_state.user_profile['current_narration'] = ""
+        cache = self.game_state.narration_cache
+        context = self.game_state.context_builder
+        key = NarrationCache.make_key(f"get_response:{text}", self.game_state.narration_state())
+        cached = cache.get(key)
+        if cached is not None:
+            context.record(text)
+            return (cached,), lambda narration: None
+
+        prompt = context.build(text, self.game_state.user_profile)
+        context.record(text)
+
+        def finish(narration):
+            if NarrationCache.cacheable(narration):
+                cache.put(key, narration)
+                context.record(narration)
+        return limit_words(self._stream_tokens(kobold_ai, prompt), self.MAX_NARRATION_WORDS), finish
+
+    def _stream_tokens(self, kobold_ai, text):
+        # Prefer the streaming endpoint; fall back to a single blocking response if it is unavailable
+        if self.narration_stream is None:
+            yield kobold_ai.get_response(self.game_state, text)
+            return
+        # One deadline for the whole turn: the stream, its abort and the blocking fallback
+        expires = self.narration_stream.expires_at()
+        tokens = self.narration_stream.stream(text, max_length=self.MAX_NARRATION_WORDS * 2, expires=expires)
+        try:
+            first = next(tokens, None)
+        except KoboldClient.ERRORS:
+            first = None
+        if first is None:
+            # Returns the fallback narration at once if the deadline is spent or the circuit is open
+            yield self.narration_stream.generate(text, max_length=self.MAX_NARRATION_WORDS * 2, expires=expires)
+            return
+        try:
+            yield first
+            yield from tokens
+        except KoboldClient.ERRORS:
+            # Deadline or connection lost mid-stream; the breaker has the failure, keep what arrived
+            return
+        finally:
+            tokens.close()
+
+    def _render_narration_chunk(self, chunk):
+        self.game_state.user_profile['current_narration'] += chunk
+        print(chunk, end="", flush=True)
+
+    def handle_turn_input(self, user_input):
+        return self.on_command(user_input)
+
+    def play_turn(self, command, narrate=True):
+        """Run one non-interactive turn; returns the command result and its narration."""
+        span = self.profiler.span
+        with span("turn"):
+            with span("time_flow"):
+                self.time_flow()
+            with span("process_events"):
+                self.process_events(self.EVENTS_PER_TICK)
+            with span("on_command"):
+                result = self.handle_turn_input(command.strip())
+            narration = ""
+            if narrate and isinstance(result, str) and result != "Command not recognized.":
+                with span("narration"):
+                    narration = "".join(self.narration_chunks(result))
+                self.game_state.user_profile['current_narration'] = narration
+            with span("autosave"):
+                self.autosave()
+        return result, narration
+
+    @staticmethod
+    def _read_input(loop, prompt):
+        """Future for the next input line. The read runs in a daemon thread rather than the
+        default executor, so a prompt still waiting after Ctrl-C does not hold up shutdown."""
+        future = loop.create_future()
+
+        def resolve(line, error):
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(line)
+
+        def read():
+            # Byte by byte from the descriptor: input() would hold the stdin buffer lock while
+            # waiting, and a daemon thread holding that lock aborts interpreter shutdown
+            data = bytearray()
+            try:
+                while not data.endswith(b"\n"):
+                    byte = os.read(sys.stdin.fileno(), 1)
+                    if not byte:
+                        break
+                    data += byte
+                if not data:
+                    raise EOFError("EOF when reading a line")
+                line, error = data.decode(sys.stdin.encoding or 'utf-8', errors='replace').rstrip("\r\n"), None
+            except (EOFError, OSError, ValueError) as e:
+                line, error = None, e
+            try:
+                loop.call_soon_threadsafe(resolve, line, error)
+            except RuntimeError:
+                pass  # the loop closed while we were waiting for input
+
+        print(prompt, end="", flush=True)
+        threading.Thread(target=read, daemon=True).start()
+        return future
+
+    async def game_loop_async(self):
+        """Game loop that streams narration in the background while reading the next command."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        pipeline = NarrationPipeline(self.open_narration, self._render_narration_chunk)
+        await pipeline.start()
+        self.display_adventure_interface()
+        span = self.profiler.span
+        try:
+            while self.game_state.game_handler.in_game:
+                with span("time_flow"):
+                    self.time_flow()
+                with span("process_events"):
+                    self.process_events(self.EVENTS_PER_TICK)
+                raw_input = (await self._read_input(loop, "\n> ")).strip()
+                user_input = raw_input.lower()
+                if not user_input:
+                    continue
+
+                if user_input == self.EXIT_CMD:
+                    self.game_state.narrator.handle_narration("Exiting the adventure.")
+                    self.game_state.game_handler.in_game = False
+                    break
+
+                with span("on_command"):
+                    result = self.handle_turn_input(raw_input)
+                if isinstance(result, str) and result != "Command not recognized.":
+                    print(result)
+                    pipeline.submit(result)
+                with span("autosave"):
+                    self.autosave()
+
+            await pipeline.drain()
+
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\nSaving game...")
+            self.save_game()
+            self.game_state.save_caches()
+            self.game_state.game_handler.in_game = False
+            print("Game saved. Exiting...")
+
+        except Exception as e:
+            print(ErrorHandler.handle_game_error('data', str(e)))
+        finally:
+            await pipeline.stop()
+
     def start_interface(self):
         self.display_menu()
 
@@ -1035,21 +3652,400 @@ class Interface:
         }
         self.game_state.user_profile['current_location'] = initial_location
 
-        # Properly indented code block
-        self.map_generator.user_profile = {
-            "current_location": {
-                "coordinates": {
-                    "latitude": initial_location["latitude"],
-                    "longitude": initial_location["longitude"]
-                }
-            }
+        # Local geodata lookup instead of fetching real-world data on the startup path
+        nearest = self.world.nearest(initial_location["latitude"], initial_location["longitude"], kind='landmark', max_km=50)
+        if nearest:
+            distance, landmark = nearest
+            print(f"Nearest landmark to {initial_location['town']}: {landmark.name} ({distance:.1f} km)")
+
+        self.start_interface()    
+
+
+class StubKoboldAI:
+    """Local stand-in for Core.KoboldAIIntegration used by headless runs."""
+
+    def __init__(self, game_state, latency=0.0):
+        self.game_state = game_state
+        self.latency = latency
+        self.history = []
+
+    def get_response(self, game_state, text):
+        if self.latency:
+            time.sleep(self.latency)
+        return f"The story continues: {text}"
+
+    def generate_narration(self, game_state, text):
+        return self.get_response(game_state, text)
+
+    def setup(self, game_state, context):
+        pass
+
+    def save_game_state_to_history(self, game_state_data):
+        self.history.append(game_state_data)
+
+
+class HeadlessRunner:
+    """Plays scripted command streams through Interface sessions without a TTY."""
+
+    def __init__(self, commands, sessions=1, narrate=True, stub_latency=0.0, save_dir=None):
+        self.commands = list(commands)
+        self.sessions = sessions
+        self.narrate = narrate
+        self.stub_latency = stub_latency
+        self.save_dir = save_dir
+
+    @staticmethod
+    def read_script(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    def create_interface(self, index, save_dir):
+        services = {'kobold_ai': lambda game_state: StubKoboldAI(game_state, self.stub_latency)}
+        interface = Interface(
+            save_path=os.path.join(save_dir, f"session_{index}.json"),
+            services=services,
+            stream_narration=False,
+            render=False,
+        )
+        interface.AUTOSAVE_EVERY_TURN = False
+        return interface
+
+    def run_session(self, index, save_dir) -> dict:
+        interface = self.create_interface(index, save_dir)
+        turns = []
+        for command in self.commands:
+            started = time.perf_counter()
+            try:
+                result, error = interface.play_turn(command, narrate=self.narrate)[0], None
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            turns.append({
+                'command': command,
+                'latency': time.perf_counter() - started,
+                'result': result if isinstance(result, (str, bool, int, float, type(None))) else repr(result),
+                'error': error,
+            })
+
+        profile = interface.game_state.user_profile
+        return {
+            'session': index,
+            'turns': turns,
+            'outcome': {key: profile.get(key) for key in ('time', 'money', 'mysteryProgress', 'current_location')},
+        }
+
+    def run(self) -> dict:
+        import statistics
+        import tempfile
+
+        with contextlib.ExitStack() as stack:
+            save_dir = self.save_dir or stack.enter_context(tempfile.TemporaryDirectory())
+            devnull = stack.enter_context(open(os.devnull, 'w'))
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(devnull):
+                results = [self.run_session(index, save_dir) for index in range(self.sessions)]
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(turn['latency'] for result in results for turn in result['turns'])
+        return {
+            'sessions': self.sessions,
+            'turns': len(latencies),
+            'errors': sum(1 for result in results for turn in result['turns'] if turn['error']),
+            'elapsed': elapsed,
+            'turns_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+            'latency_ms': {
+                'mean': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+                'p50': percentile(latencies, 0.50) * 1000,
+                'p95': percentile(latencies, 0.95) * 1000,
+                'p99': percentile(latencies, 0.99) * 1000,
+            },
+            'results': results,
+            'profile': PROFILER.summary() if PROFILER.enabled else None,
         }
 
-        print(self.map_generator.fetch_real_world_data())  # This needs to align with the previous line 
 
-        self.start_interface()    
+class RemoteNarrationClient:
+    """KoboldAI stand-in for session workers; narration is produced by the host's shared client."""
+
+    def __init__(self, game_state, worker_id, requests, responses):
+        self.game_state = game_state
+        self.worker_id = worker_id
+        self.requests = requests
+        self.responses = responses
+        self._request_ids = itertools.count()
+
+    def get_response(self, game_state, text):
+        request_id = next(self._request_ids)
+        self.requests.put((self.worker_id, request_id, text))
+        while True:
+            response_id, narration, error = self.responses.get()
+            if response_id == request_id:
+                break
+        if error:
+            raise ConnectionError(error)
+        return narration
+
+    def generate_narration(self, game_state, text):
+        return self.get_response(game_state, text)
+
+    def setup(self, game_state, context):
+        pass
+
+    def save_game_state_to_history(self, game_state_data):
+        pass
+
+
+def session_save_path(save_dir, session_id):
+    return os.path.join(save_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', str(session_id)) + ".json")
+
+
+def _session_worker(worker_id, inbox, outbox, narration_requests, narration_responses, save_dir):
+    """Worker process: owns a set of isolated sessions and runs their turns."""
+    sessions = {}
+
+    def kobold_factory(game_state):
+        return RemoteNarrationClient(game_state, worker_id, narration_requests, narration_responses)
+
+    def open_session(session_id):
+        interface = Interface(save_path=session_save_path(save_dir, session_id),
+                              services={'kobold_ai': kobold_factory}, stream_narration=False, render=False)
+        if os.path.exists(interface.save_engine.path):
+            interface.load_game()
+        sessions[session_id] = interface
+        return True
+
+    def close_session(session_id):
+        interface = sessions.pop(session_id, None)
+        if not interface:
+            return False
+        return interface.save_game(quiet=True)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            request_id, session_id, operation, payload = message
+            try:
+                if operation == 'open':
+                    result = open_session(session_id)
+                elif operation == 'turn':
+                    result, narration = sessions[session_id].play_turn(payload)
+                    result = {'result': result if isinstance(result, str) else repr(result), 'narration': narration}
+                elif operation == 'close':
+                    result = close_session(session_id)
+                else:
+                    raise ValueError(f"Unknown operation: {operation}")
+                outbox.put((request_id, result, None))
+            except Exception as e:
+                outbox.put((request_id, None, f"{type(e).__name__}: {e}"))
+
+        for session_id in list(sessions):
+            close_session(session_id)
+        # The sessions share this process's caches; write them once, as the worker exits
+        save_shared_caches()
+
+
+class SessionHost:
+    """Serves many isolated game sessions from a pool of worker processes.
+
+    Each session lives on one worker (see `routes`) and saves to its own file under
+    save_dir. All workers send narration to a single client in the host process.
+    """
+
+    BATCH_WINDOW = float(os.environ.get("NARRATION_BATCH_WINDOW_MS", "20")) / 1000
+    BATCH_SIZE = int(os.environ.get("NARRATION_BATCH_SIZE", "8"))
+
+    def __init__(self, workers=None, save_dir="sessions", narrate=None, generate_batch=None):
+        self.worker_count = workers or os.cpu_count() or 1
+        self.save_dir = save_dir
+        self.kobold_client = KoboldClient(KOBOLD_ENDPOINT, pool_size=self.BATCH_SIZE)
+        self.narrate = narrate or self._generate_narration
+        # Native batch endpoints can be passed as generate_batch; otherwise batches fan out concurrently
+        self.generate_batch = generate_batch or NarrationBatcher.concurrent(self.narrate, self.BATCH_SIZE)
+        self.batcher = None
+        self.routes = {}  # session_id -> worker index
+        self.workers = []
+        self._pending = {}
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _generate_narration(self, text):
+        return self.kobold_client.generate(text, max_length=Interface.MAX_NARRATION_WORDS * 2)
+
+    def start(self):
+        os.makedirs(self.save_dir, exist_ok=True)
+        self.batcher = NarrationBatcher(self.generate_batch, window=self.BATCH_WINDOW, max_batch=self.BATCH_SIZE)
+        import multiprocessing
+
+        context = multiprocessing.get_context("spawn")
+        self.outbox = context.Queue()
+        self.narration_requests = context.Queue()
+        for worker_id in range(self.worker_count):
+            inbox, narration_responses = context.Queue(), context.Queue()
+            process = context.Process(
+                target=_session_worker,
+                args=(worker_id, inbox, self.outbox, self.narration_requests, narration_responses, self.save_dir),
+                daemon=True,
+            )
+            process.start()
+            self.workers.append({'process': process, 'inbox': inbox, 'narration': narration_responses, 'sessions': 0})
+
+        for target in (self._collect_results, self._serve_narration):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _collect_results(self):
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                break
+            request_id, result, error = message
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(result)
+
+    def _serve_narration(self):
+        while True:
+            request = self.narration_requests.get()
+            if request is None:
+                break
+            self._answer_narration(*request)
+
+    def _answer_narration(self, worker_id, request_id, text):
+        def reply(future):
+            try:
+                response = (request_id, future.result(), None)
+            except Exception as e:
+                response = (request_id, None, f"{type(e).__name__}: {e}")
+            self.workers[worker_id]['narration'].put(response)
+
+        self.batcher.submit(text).add_done_callback(reply)
+
+    def _send(self, session_id, operation, payload=None) -> "Future":
+        from concurrent.futures import Future
+
+        future = Future()
+        with self._lock:
+            worker_id = self.routes[session_id]
+            request_id = next(self._request_ids)
+            self._pending[request_id] = future
+        self.workers[worker_id]['inbox'].put((request_id, session_id, operation, payload))
+        return future
+
+    def open_session(self, session_id) -> "Future":
+        with self._lock:
+            if session_id not in self.routes:
+                worker_id = min(range(len(self.workers)), key=lambda index: self.workers[index]['sessions'])
+                self.routes[session_id] = worker_id
+                self.workers[worker_id]['sessions'] += 1
+        return self._send(session_id, 'open')
+
+    def play(self, session_id, command) -> "Future":
+        return self._send(session_id, 'turn', command)
+
+    def close_session(self, session_id) -> "Future":
+        future = self._send(session_id, 'close')
+        with self._lock:
+            worker_id = self.routes.pop(session_id)
+            self.workers[worker_id]['sessions'] -= 1
+        return future
+
+    def stop(self, timeout=10):
+        for worker in self.workers:
+            worker['inbox'].put(None)
+        for worker in self.workers:
+            worker['process'].join(timeout)
+        self.outbox.put(None)
+        self.narration_requests.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self.batcher.close()
+        self.workers.clear()
+        self.routes.clear()
+
+
+def import_time_report(top=10) -> dict:
+    """Import this module in a fresh interpreter under -X importtime and summarise the cost."""
+    import subprocess
+
+    directory, filename = os.path.split(os.path.abspath(__file__))
+    module = os.path.splitext(filename)[0]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [directory, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1]}")
+
+    total_us, modules = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == module:
+            total_us = int(cumulative_us)
+        else:
+            modules.append((int(cumulative_us), int(self_us), name))
+    modules.sort(reverse=True)
+    return {
+        'module': module,
+        'total_ms': total_us / 1000,
+        'slowest': [{'module': name, 'cumulative_ms': cumulative / 1000, 'self_ms': own / 1000}
+                    for cumulative, own, name in modules[:top]],
+    }
+
+
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=Interface.GAME_TITLE)
+    parser.add_argument('--headless', metavar='SCRIPT', help="play a command script without a terminal")
+    parser.add_argument('--sessions', type=int, default=1, help="number of headless sessions to run")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="simulated narration latency in seconds")
+    parser.add_argument('--no-narration', action='store_true', help="skip narration in headless runs")
+    parser.add_argument('--details', action='store_true', help="include per-turn results in the report")
+    parser.add_argument('--build-geodata', nargs=2, metavar=('CSV', 'OUTPUT'),
+                        help="compile a gazetteer CSV into a memory-mapped geodata file")
+    parser.add_argument('--cell-degrees', type=float, default=0.5, help="grid cell size for --build-geodata")
+    parser.add_argument('--import-report', action='store_true', help="report how long importing this module takes")
+    parser.add_argument('--import-budget-ms', type=float, help="with --import-report, fail above this many ms")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    interface = Interface()
-    interface.main()
+    args = parse_args()
+    if args.import_report:
+        report = import_time_report()
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        if args.import_budget_ms is not None and report['total_ms'] > args.import_budget_ms:
+            print(f"Import took {report['total_ms']:.1f} ms, over the {args.import_budget_ms:.1f} ms budget",
+                  file=sys.stderr)
+            sys.exit(1)
+    elif args.build_geodata:
+        count = build_geodata(*args.build_geodata, cell_degrees=args.cell_degrees)
+        print(f"Wrote {count} places to {args.build_geodata[1]}")
+    elif args.headless:
+        runner = HeadlessRunner(
+            HeadlessRunner.read_script(args.headless),
+            sessions=args.sessions,
+            narrate=not args.no_narration,
+            stub_latency=args.stub_latency,
+        )
+        report = runner.run()
+        PROFILER.export()
+        if not args.details:
+            report.pop('results')
+        json.dump(report, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        interface = Interface()
+        interface.main()
@@ -0,0 +1,292 @@
+"""Benchmarks for the Interface hot paths, run against a stubbed Core package.
+
+    python bench_interface.py                      # run and compare with bench_baseline.json
+    python bench_interface.py --save-baseline      # record the current numbers as the baseline
+    python bench_interface.py --filter save --quick
+
+Each case runs at a small and a large state size (clues, queued events, undo history).
+A case is a regression when its median time per call is more than --threshold slower
+than the baseline. The script exits with status 1 on a regression, on a case that raises,
+and on a case the baseline has no entry for.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+BASELINE_PATH = "bench_baseline.json"
+
+
+def install_stub_core():
+    """Register a minimal Core package so the game module imports without the real one."""
+
+    class Service:
+        def __init__(self, *args, **kwargs):
+            self.in_game = True
+            self.mode = "user"
+
+        def __getattr__(self, name):
+            if name.startswith('__'):
+                raise AttributeError(name)
+            return lambda *args, **kwargs: name
+
+    class KoboldAIIntegration(Service):
+        def get_response(self, game_state, text):
+            return f"The story continues: {text}"
+
+        def generate_narration(self, game_state, text):
+            return self.get_response(game_state, text)
+
+    class MapGenerator(Service):
+        def initialize_map(self, location):
+            return f"map of {location}"
+
+    class EncounterManager(Service):
+        def process_encounter(self, encounter):
+            return {'time_cost': 1, 'narration': "The encounter passes."}
+
+    core = types.ModuleType("Core.Core")
+    core.KoboldAIIntegration = KoboldAIIntegration
+    core.MapGenerator = MapGenerator
+    core.EncounterManager = EncounterManager
+    for name in ('Narrator', 'GameManager', 'GameHandler', 'EmotionalStateTracker',
+                 'CommunicationSystem', 'GameWorld', 'Skillset', 'Player'):
+        setattr(core, name, type(name, (Service,), {}))
+    package = types.ModuleType("Core")
+    package.__path__ = []
+    package.Core = core
+    sys.modules["Core"] = package
+    sys.modules["Core.Core"] = core
+
+
+install_stub_core()
+os.environ.setdefault("GAME_PROFILE", "0")
+
+import INTERFACCLAUDEGAMELOOP as game  # noqa: E402  (needs the stub Core first)
+
+
+class Bench:
+    """A benchmarked call: setup(size) returns the function to time."""
+
+    def __init__(self, name, setup, sizes):
+        self.name = name
+        self.setup = setup
+        self.sizes = sizes
+
+
+def make_interface(save_dir, clues=0, events=0):
+    interface = game.Interface(save_path=os.path.join(save_dir, "bench_save.json"), stream_narration=False)
+    interface.AUTOSAVE_EVERY_TURN = False
+    interface.renderer = game.TerminalRenderer(stream=io.StringIO(), ansi=False)
+    interface.game_state.journals['clues'].extend(f"Clue {n}: a torn ticket stub" for n in range(clues))
+    for n in range(events):
+        interface.event_queue.push({'type': 'encounter', 'name': f"event {n}"})
+    return interface
+
+
+def bench_cases(save_dir):
+    def on_command(size):
+        interface = make_interface(save_dir, clues=size)
+        return lambda: interface.on_command("look around")
+
+    def handle_user_input(size):
+        interface = make_interface(save_dir, clues=size)
+        return lambda: interface.handle_user_input("inventory")
+
+    def calculate_time_passage(size):
+        interface = make_interface(save_dir)
+        action = " and ".join(["rest 2 hours", "walk 30 minutes"] * size)
+        return lambda: interface.calculate_time_passage(action)
+
+    def display_adventure_interface(size):
+        interface = make_interface(save_dir, clues=size)
+        interface.renderer.enabled = True
+
+        def run():
+            interface.renderer.invalidate()
+            interface.renderer.stream.seek(0)
+            interface.display_adventure_interface()
+        return run
+
+    def save_game(size):
+        interface = make_interface(save_dir, clues=size)
+        return lambda: interface.save_game(quiet=True)
+
+    def load_game(size):
+        interface = make_interface(save_dir, clues=size)
+        interface.save_game(quiet=True)
+        return interface.load_game
+
+    def update_revert_state(size):
+        interface = make_interface(save_dir)
+        manager = interface.state_manager
+        for n in range(size):
+            manager.update_state({'money': n, 'name': "Traveler"})
+
+        def run():
+            manager.update_state({'money': 1, 'name': "Traveler"})
+            manager.revert_state()
+        return run
+
+    def process_events(size):
+        interface = make_interface(save_dir, events=size)
+        queue = interface.event_queue
+
+        def run():
+            # Handle one event and requeue one, so the backlog stays at `size`
+            interface.process_events(1)
+            queue.push({'type': 'encounter', 'name': "requeued"})
+        return run
+
+    def generate_episodic_content(size):
+        interface = make_interface(save_dir, clues=size)
+        return lambda: interface._generate_episodic_content("explore the market")
+
+    clue_sizes = (10, 10_000)
+    return [
+        Bench("on_command", on_command, clue_sizes),
+        Bench("handle_user_input", handle_user_input, clue_sizes),
+        Bench("calculate_time_passage", calculate_time_passage, (1, 100)),
+        Bench("display_adventure_interface", display_adventure_interface, clue_sizes),
+        Bench("save_game", save_game, clue_sizes),
+        Bench("load_game", load_game, clue_sizes),
+        Bench("state_update_revert", update_revert_state, (1, 1_000)),
+        Bench("process_events", process_events, (1, 10_000)),
+        Bench("generate_episodic_content", generate_episodic_content, clue_sizes),
+    ]
+
+
+def time_call(func, repeat, min_time):
+    """Median seconds per call over `repeat` rounds, each at least min_time long."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number)
+    return statistics.median(rounds), number
+
+
+def run_benchmarks(pattern=None, repeat=5, min_time=0.05) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as save_dir:
+        for bench in bench_cases(save_dir):
+            if pattern and pattern not in bench.name:
+                continue
+            for size in bench.sizes:
+                key = f"{bench.name}[{size}]"
+                random.seed(size)
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        func = bench.setup(size)
+                        seconds, number = time_call(func, repeat, min_time)
+                    results[key] = {'seconds': seconds, 'loops': number}
+                except Exception as e:
+                    results[key] = {'error': f"{type(e).__name__}: {e}"}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Rows of (key, current, baseline, ratio, status) and whether any case failed.
+
+    A case fails when it raised, when it is slower than the baseline by more than threshold,
+    or when a baseline exists but has no timing for it.
+    """
+    rows, failed = [], False
+    for key, result in results.items():
+        base = baseline.get(key, {}).get('seconds')
+        if 'error' in result:
+            rows.append((key, None, base, None, f"ERROR {result['error']}"))
+            failed = True
+            continue
+        ratio = result['seconds'] / base if base else None
+        status = ""
+        if baseline and base is None:
+            status, failed = "NO BASELINE", True
+        elif ratio is not None and ratio > 1 + threshold:
+            status, failed = "REGRESSION", True
+        elif ratio is not None and ratio < 1 - threshold:
+            status = "faster"
+        rows.append((key, result['seconds'], base, ratio, status))
+    return rows, failed
+
+
+def format_report(rows):
+    def us(seconds):
+        return f"{seconds * 1e6:12.1f}" if seconds is not None else f"{'-':>12}"
+
+    lines = [f"{'benchmark':<40} {'us/call':>12} {'baseline':>12} {'ratio':>7}  status"]
+    for key, current, base, ratio, status in rows:
+        ratio_text = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+        lines.append(f"{key:<40} {us(current)} {us(base)} {ratio_text}  {status}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Interface hot paths")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline results file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before a regression")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5, help="timed rounds per case")
+    parser.add_argument('--quick', action='store_true', help="shorter rounds, for smoke runs")
+    parser.add_argument('--json', action='store_true', help="print raw results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = run_benchmarks(args.filter, repeat=2 if args.quick else args.repeat,
+                             min_time=0.01 if args.quick else 0.05)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    rows, failed = compare(results, baseline, args.threshold)
+    errors = [key for key, result in results.items() if 'error' in result]
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(rows))
+
+    if args.save_baseline:
+        # Failed cases keep their previous timing rather than recording an error as the baseline
+        timed = {key: result for key, result in results.items() if 'error' not in result}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'results': {**baseline, **timed}}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        if errors:
+            print(f"Not recorded, the case raised: {', '.join(errors)}", file=sys.stderr)
+            return 1
+        return 0
+    if failed:
+        print(f"Errors, missing baselines or regressions above {args.threshold:.0%} against {args.baseline}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
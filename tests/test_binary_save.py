@@ -0,0 +1,81 @@
+import io
+import struct
+
+import pytest
+
+from INTERFACCLAUDEGAMELOOP import BinarySaveFormat, DeferredSection, SaveEngine, deferred_section
+
+
+def binary_engine(tmp_path):
+    return SaveEngine(str(tmp_path / "save.bin"), binary=True)
+
+
+def test_binary_round_trip(tmp_path):
+    engine = binary_engine(tmp_path)
+    sections = {'profile': {'name': "Traveler", 'money': 100}, 'lore': ["x" * 1000], 'npcs': []}
+    engine.save(sections)
+
+    assert BinarySaveFormat.is_binary(engine.path)
+    loaded = SaveEngine(engine.path, binary=True).load()
+    assert {name: loaded[name] for name in loaded} == sections
+
+
+def test_large_sections_are_compressed(tmp_path):
+    engine = binary_engine(tmp_path)
+    engine.save({'small': [1], 'large': ["clue"] * 500})
+    _, sections = BinarySaveFormat.load(engine.path)
+    assert sections.raw['small'][0] == BinarySaveFormat.CODEC_JSON
+    assert sections.raw['large'][0] == BinarySaveFormat.CODEC_ZLIB
+
+
+def test_sections_decode_on_first_access(tmp_path):
+    engine = binary_engine(tmp_path)
+    engine.save({'profile': {'money': 1}, 'lore': {'city': "old"}})
+    sections = SaveEngine(engine.path, binary=True).load()
+
+    assert not sections.is_decoded('lore')
+    assert sections['lore'] == {'city': "old"}
+    assert sections.is_decoded('lore')
+
+
+def test_undecoded_sections_are_carried_through_saves(tmp_path):
+    engine = binary_engine(tmp_path)
+    engine.save({'profile': {'money': 1}, 'lore': {'city': "old"}})
+
+    reloaded = SaveEngine(engine.path, binary=True)
+    sections = reloaded.load()
+    lore = deferred_section(sections, 'lore')
+    assert isinstance(lore, DeferredSection)
+
+    # Only the profile changed; the lore is neither decoded nor rewritten
+    assert reloaded.save({'profile': {'money': 2}, 'lore': lore}) == 1
+    assert not sections.is_decoded('lore')
+
+    final = SaveEngine(engine.path, binary=True).load()
+    assert final['profile'] == {'money': 2}
+    assert final['lore'] == {'city': "old"}
+
+
+def test_deferred_section_survives_compaction(tmp_path):
+    engine = binary_engine(tmp_path)
+    engine.save({'profile': {'money': 1}, 'lore': {'city': "old"}})
+
+    reloaded = SaveEngine(engine.path, binary=True, compact_every=0)
+    sections = reloaded.load()
+    reloaded.save({'profile': {'money': 2}, 'lore': deferred_section(sections, 'lore')})
+
+    final = SaveEngine(engine.path, binary=True).load()
+    assert final['lore'] == {'city': "old"}
+    assert final['profile'] == {'money': 2}
+
+
+def test_newer_format_versions_are_rejected(tmp_path):
+    path = tmp_path / "save.bin"
+    buffer = io.BytesIO()
+    BinarySaveFormat.dump(buffer, 1, {}, {})
+    data = bytearray(buffer.getvalue())
+    struct.pack_into('<H', data, len(BinarySaveFormat.MAGIC), BinarySaveFormat.VERSION + 1)
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        BinarySaveFormat.load(str(path))
@@ -0,0 +1,77 @@
+from INTERFACCLAUDEGAMELOOP import EventScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def drain(scheduler):
+    names = []
+    while True:
+        event = scheduler.pop_due()
+        if event is None:
+            return names
+        names.append(event['name'])
+
+
+def test_plain_events_are_first_in_first_out():
+    scheduler = EventScheduler(Clock())
+    for name in "abc":
+        scheduler.push({'name': name})
+    assert drain(scheduler) == ["a", "b", "c"]
+
+
+def test_priority_events_go_before_plain_ones():
+    scheduler = EventScheduler(Clock())
+    scheduler.push({'name': "plain"})
+    scheduler.push({'name': "low"}, priority=1)
+    scheduler.push({'name': "high"}, priority=5)
+    assert drain(scheduler) == ["high", "low", "plain"]
+
+
+def test_negative_priority_waits_for_plain_events():
+    scheduler = EventScheduler(Clock())
+    scheduler.push({'name': "later"}, priority=-1)
+    scheduler.push({'name': "plain"})
+    assert drain(scheduler) == ["plain", "later"]
+
+
+def test_scheduled_events_wait_until_due():
+    clock = Clock()
+    scheduler = EventScheduler(clock)
+    scheduler.push({'name': "delayed"}, delay=2)
+    scheduler.push({'name': "at"}, at=1)
+    assert scheduler.pop_due() is None
+    assert len(scheduler) == 2
+
+    clock.now = 1
+    assert drain(scheduler) == ["at"]
+    clock.now = 2
+    assert drain(scheduler) == ["delayed"]
+    assert not scheduler
+
+
+def test_due_events_are_ordered_by_priority_not_push_time():
+    clock = Clock()
+    scheduler = EventScheduler(clock)
+    scheduler.push({'name': "minor"}, at=1, priority=1)
+    scheduler.push({'name': "major"}, at=2, priority=9)
+    clock.now = 5
+    assert drain(scheduler) == ["major", "minor"]
+
+
+def test_process_dispatches_to_handlers_and_respects_the_limit():
+    scheduler = EventScheduler(Clock())
+    handled = []
+    scheduler.register('encounter', handled.append)
+    for n in range(5):
+        scheduler.append({'type': 'encounter', 'name': n})
+    scheduler.append({'type': 'unknown', 'name': "skipped"})
+
+    assert scheduler.process(max_events=3) == 3
+    assert scheduler.process() == 3
+    assert [event['name'] for event in handled] == [0, 1, 2, 3, 4]
@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from INTERFACCLAUDEGAMELOOP import CircuitBreaker, Interface, KoboldClient, limit_words
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Server-sent events with one word per token, `token_delay` seconds apart."""
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+    tokens = 50
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        if self.path != KoboldClient.STREAM_PATH:
+            self.send_response(200)
+            self.send_header('Content-Length', "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', "text/event-stream")
+        self.send_header('Connection', "close")
+        self.end_headers()
+        try:
+            for n in range(self.tokens):
+                self.wfile.write(f"data: {json.dumps({'token': f' w{n}'})}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(self.token_delay)
+            self.wfile.write(b'data: {"token": "", "finish_reason": "length"}\n\n')
+        except OSError:
+            pass
+        self.close_connection = True
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(token_delay=0.0):
+        handler = type("Handler", (StreamHandler,), {'token_delay': token_delay})
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return f"127.0.0.1:{httpd.server_address[1]}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_repeated_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_closes_or_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    open_breaker(breaker)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # one trial call at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_stream_closed_at_the_word_budget_closes_a_half_open_breaker(server):
+    client = KoboldClient(server(), deadline=5)
+    open_breaker(client.breaker)
+
+    text = "".join(limit_words(client.stream("prompt"), 5))
+    assert text.split() == ["w0", "w1", "w2", "w3", "w4"]
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.breaker.allow()
+
+
+def test_streams_read_to_the_end_reset_failures(server):
+    client = KoboldClient(server(), deadline=5)
+    client.breaker.record_failure()
+    assert len(list(client.stream("prompt"))) == StreamHandler.tokens
+    assert client.breaker.failures == 0
+
+
+def test_deadline_after_the_first_token_keeps_partial_narration(server):
+    interface = Interface.__new__(Interface)  # _stream_tokens only needs the stream client
+    interface.narration_stream = KoboldClient(server(token_delay=0.2), deadline=0.5)
+
+    started = time.monotonic()
+    text = "".join(interface._stream_tokens(None, "prompt"))
+    assert text.startswith(" w0")
+    assert text != KoboldClient.FALLBACK_NARRATION
+    assert time.monotonic() - started < 2
+    assert interface.narration_stream.breaker.failures == 1
+    assert interface.narration_stream.counters['timeouts'] == 1
+
+
+def test_unreachable_server_falls_back_and_opens_the_breaker():
+    client = KoboldClient("127.0.0.1:9", deadline=1, retries=0, breaker=CircuitBreaker(failure_threshold=1))
+    assert client.generate("prompt") == KoboldClient.FALLBACK_NARRATION
+    assert client.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ConnectionError):
+        next(client.stream("prompt"))
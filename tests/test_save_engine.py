@@ -0,0 +1,81 @@
+import json
+
+from INTERFACCLAUDEGAMELOOP import SaveEngine
+
+
+def journal_lines(engine):
+    with open(engine.journal_path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_round_trip(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"))
+    assert engine.save({'profile': {'money': 100}, 'npcs': []}) == 2
+    assert SaveEngine(engine.path).load() == {'profile': {'money': 100}, 'npcs': []}
+
+
+def test_unchanged_sections_are_not_written(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"))
+    engine.save({'profile': {'money': 100}, 'npcs': []})
+    assert engine.save({'profile': {'money': 100}, 'npcs': []}) == 0
+    assert engine.save({'profile': {'money': 90}, 'npcs': []}) == 1
+    assert [json.loads(line)['section'] for line in journal_lines(engine)] == ['profile']
+    assert SaveEngine(engine.path).load()['profile'] == {'money': 90}
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"), compact_every=3)
+    for money in range(6):
+        engine.save({'profile': {'money': money}})
+    assert engine.journal_records <= 3
+    assert SaveEngine(engine.path).load() == {'profile': {'money': 5}}
+
+
+def test_first_save_after_restart_starts_a_new_generation(tmp_path):
+    path = str(tmp_path / "save.json")
+    first = SaveEngine(path)
+    first.save({'profile': {'money': 1}})
+    first.save({'profile': {'money': 2}})
+
+    # A fresh engine that never loaded must not append to the old generation's journal
+    second = SaveEngine(path)
+    second.save({'profile': {'money': 3}})
+    assert second.generation > first.generation
+    assert SaveEngine(path).load() == {'profile': {'money': 3}}
+
+
+def test_stale_journal_records_are_ignored(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"))
+    engine.save({'profile': {'money': 1}})
+    with open(engine.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"generation":0,"section":"profile","data":{"money":99}}\n')
+    assert SaveEngine(engine.path).load() == {'profile': {'money': 1}}
+
+
+def test_torn_journal_record_is_dropped_and_later_saves_survive(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"))
+    engine.save({'profile': {'money': 1}, 'npcs': []})
+    engine.save({'profile': {'money': 2}, 'npcs': []})
+    with open(engine.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"generation":1,"section":"pro')  # crash in the middle of a write
+
+    recovered = SaveEngine(engine.path)
+    assert recovered.load() == {'profile': {'money': 2}, 'npcs': []}
+    recovered.save({'profile': {'money': 3}, 'npcs': []})
+    recovered.save({'profile': {'money': 3}, 'npcs': ['Bob']})
+
+    assert SaveEngine(engine.path).load() == {'profile': {'money': 3}, 'npcs': ['Bob']}
+    assert all(json.loads(line) for line in journal_lines(engine))
+
+
+def test_unterminated_final_record_counts_as_torn(tmp_path):
+    engine = SaveEngine(str(tmp_path / "save.json"))
+    engine.save({'profile': {'money': 1}})
+    engine.save({'profile': {'money': 2}})
+    with open(engine.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"generation":1,"section":"profile","data":{"money":7}}')
+
+    recovered = SaveEngine(engine.path)
+    assert recovered.load() == {'profile': {'money': 2}}
+    recovered.save({'profile': {'money': 4}})
+    assert SaveEngine(engine.path).load() == {'profile': {'money': 4}}